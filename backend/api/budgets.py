@@ -0,0 +1,36 @@
+QUERY_BUDGETS: dict[str, int] = {
+    'recipe-list': 6,
+    'recipe-detail': 4,
+    'recipe-download-shopping-cart': 2,
+    'user-list': 3,
+    'user-me': 2,
+    'user-subscriptions': 4,
+    'tag-list': 1,
+    'ingredient-list': 1,
+}
+
+BUDGET_METHODS: tuple[str, ...] = ('GET', 'HEAD')
+
+BUDGET_REQUESTS: tuple[tuple[str, bool], ...] = (
+    ('/api/recipes/?limit=6', False),
+    ('/api/recipes/?limit=6', True),
+    ('/api/recipes/?limit=6&is_favorited=1', True),
+    ('/api/recipes/?limit=6&is_in_shopping_cart=1', True),
+    ('/api/recipes/?limit=6&author={author_id}&tags={tag_slug}', True),
+    ('/api/recipes/{recipe_id}/', False),
+    ('/api/recipes/{recipe_id}/', True),
+    ('/api/recipes/download_shopping_cart/', True),
+    ('/api/users/?limit=6', True),
+    ('/api/users/me/', True),
+    ('/api/users/subscriptions/?limit=6&recipes_limit=3', True),
+    ('/api/tags/', False),
+    ('/api/ingredients/', False),
+    ('/api/ingredients/?name=а', False),
+)
+
+
+def get_query_budget(route: str | None, method: str) -> int | None:
+    # Бюджеты заданы для чтения, запись рецептов дороже по определению.
+    if method not in BUDGET_METHODS:
+        return None
+    return QUERY_BUDGETS.get(route)
@@ -0,0 +1,120 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
+from django.http import HttpRequest
+from django.utils.http import quote_etag, urlencode
+
+
+RECIPES_CATALOG: str = 'recipes'
+TAGS_CATALOG: str = 'tags'
+INGREDIENTS_CATALOG: str = 'ingredients'
+RECIPES_LIST_CACHE_PARAMS: tuple[str, ...] = (
+    'page',
+    'cursor',
+    'limit',
+    'tags',
+    'author',
+)
+RECIPES_LIST_MULTI_PARAMS: tuple[str, ...] = ('tags',)
+RECIPE_ETAG_CATALOGS: tuple[str, ...] = (TAGS_CATALOG, INGREDIENTS_CATALOG)
+
+
+def get_version_key(name: str) -> str:
+    return f'catalog:{name}:version'
+
+
+def get_version(name: str) -> int:
+    key = get_version_key(name)
+    version = cache.get(key)
+    if version is None:
+        initial = time.time_ns()
+        cache.add(key, initial, timeout=None)
+        version = cache.get(key, initial)
+    return version
+
+
+async def aget_version(name: str) -> int:
+    key = get_version_key(name)
+    version = await cache.aget(key)
+    if version is None:
+        initial = time.time_ns()
+        await cache.aadd(key, initial, timeout=None)
+        version = await cache.aget(key, initial)
+    return version
+
+
+def bump_version(name: str) -> int:
+    key = get_version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.add(key, version, timeout=None)
+        return version
+
+
+def bump_version_on_commit(name: str) -> None:
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def get_recipes_list_digest(request: HttpRequest) -> str | None:
+    query_params = request.GET
+    if set(query_params) - set(RECIPES_LIST_CACHE_PARAMS):
+        return None
+
+    # Ссылки next/previous в кэше абсолютные, поэтому ключ зависит от
+    # схемы и хоста. Одиночные параметры DRF берёт по последнему
+    # значению, как QueryDict.get(), множественные сравниваются как set.
+    normalized = urlencode(
+        [
+            ('origin', f'{request.scheme}://{request.get_host()}'),
+            *(
+                (param, sorted(set(query_params.getlist(param)))
+                 if param in RECIPES_LIST_MULTI_PARAMS
+                 else query_params.get(param))
+                for param in RECIPES_LIST_CACHE_PARAMS
+                if param in query_params
+            ),
+        ],
+        doseq=True
+    )
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def get_recipes_list_cache_key(request: HttpRequest) -> str | None:
+    digest = get_recipes_list_digest(request)
+    if digest is None:
+        return None
+    return f'recipes:list:{get_version(RECIPES_CATALOG)}:{digest}'
+
+
+async def aget_recipes_list_cache_key(request: HttpRequest) -> str | None:
+    digest = get_recipes_list_digest(request)
+    if digest is None:
+        return None
+    return f'recipes:list:{await aget_version(RECIPES_CATALOG)}:{digest}'
+
+
+def make_recipe_etag(recipe: Model, catalog_versions: list[int]) -> str:
+    validator = ':'.join(str(part) for part in (
+        recipe.id,
+        recipe.updated_at.timestamp(),
+        int(recipe.is_favorited),
+        int(recipe.is_in_shopping_cart),
+        int(recipe.is_author_subscribed),
+        *catalog_versions,
+    ))
+    return quote_etag(hashlib.md5(validator.encode()).hexdigest())
+
+
+def get_recipe_etag(recipe: Model) -> str:
+    return make_recipe_etag(
+        recipe, [get_version(name) for name in RECIPE_ETAG_CATALOGS])
+
+
+async def aget_recipe_etag(recipe: Model) -> str:
+    return make_recipe_etag(
+        recipe, [await aget_version(name) for name in RECIPE_ETAG_CATALOGS])
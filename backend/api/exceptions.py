@@ -8,3 +8,15 @@ class NotSubscribedError(Exception):
 
 class SelfSubscriptionError(Exception):
     pass
+
+
+class ImageTooLargeError(Exception):
+    pass
+
+
+class ImageTooManyPixelsError(Exception):
+    pass
+
+
+class InvalidImageError(Exception):
+    pass
@@ -0,0 +1,194 @@
+import csv
+import io
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+
+ShoppingCartRow = tuple[str, int, str]
+ShoppingCartRows = Iterable[ShoppingCartRow]
+AsyncShoppingCartRows = AsyncIterable[ShoppingCartRow]
+
+
+class ShoppingCartExporter(BaseRenderer, ABC):
+    charset = 'utf-8'
+    title: str = 'Список покупок'
+    filename: str = 'shopping_cart'
+
+    def get_content_type(self) -> str:
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    def get_filename(self) -> str:
+        return f'{self.filename}.{self.format}'
+
+    @abstractmethod
+    def stream(self, rows: ShoppingCartRows) -> Iterator[bytes]:
+        ...
+
+    @abstractmethod
+    def astream(self, rows: AsyncShoppingCartRows) -> AsyncIterator[bytes]:
+        ...
+
+
+class LineExporter(ShoppingCartExporter):
+    # Каждая строка корзины сразу кодируется в отдельный кусок ответа.
+
+    @abstractmethod
+    def format_header(self) -> str:
+        ...
+
+    @abstractmethod
+    def format_row(self, row: ShoppingCartRow) -> str:
+        ...
+
+    def stream(self, rows: ShoppingCartRows) -> Iterator[bytes]:
+        yield self.format_header().encode(self.charset)
+        for row in rows:
+            yield self.format_row(row).encode(self.charset)
+
+    async def astream(self,
+                      rows: AsyncShoppingCartRows) -> AsyncIterator[bytes]:
+        yield self.format_header().encode(self.charset)
+        async for row in rows:
+            yield self.format_row(row).encode(self.charset)
+
+
+class TextExporter(LineExporter):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def format_header(self) -> str:
+        return f'{self.title}\n\n'
+
+    def format_row(self, row: ShoppingCartRow) -> str:
+        ingredient, amount, measurement_unit = row
+        return f'- {ingredient}: {amount} {measurement_unit}\n'
+
+
+class EchoBuffer:
+    def write(self, value: str) -> str:
+        return value
+
+
+class CSVExporter(LineExporter):
+    media_type = 'text/csv'
+    format = 'csv'
+    header: tuple[str, ...] = (
+        'Ингредиент',
+        'Количество',
+        'Единица измерения',
+    )
+
+    def format_header(self) -> str:
+        return self.format_row(self.header)
+
+    def format_row(self, row: Iterable) -> str:
+        return csv.writer(EchoBuffer()).writerow(row)
+
+
+class PDFExporter(ShoppingCartExporter):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name: str | None = None
+    font_lock = threading.Lock()
+    font_size: int = 12
+    line_height: float = 7 * mm
+    margin: float = 20 * mm
+    chunk_size: int = 64 * 1024
+
+    @classmethod
+    def get_font(cls) -> str:
+        if cls.font_name is not None:
+            return cls.font_name
+        with cls.font_lock:
+            if cls.font_name is None:
+                font_path = Path(settings.SHOPPING_CART_PDF_FONT)
+                if not font_path.is_file():
+                    # Встроенные шрифты PDF не содержат кириллицы.
+                    raise ImproperlyConfigured(
+                        f'Не найден шрифт для PDF: {font_path}. '
+                        'Укажите SHOPPING_CART_PDF_FONT.')
+                pdfmetrics.registerFont(
+                    TTFont(font_path.stem, str(font_path)))
+                cls.font_name = font_path.stem
+        return cls.font_name
+
+    def stream(self, rows: ShoppingCartRows) -> Iterator[bytes]:
+        # Шрифт проверяется до отправки заголовков ответа.
+        return self.stream_pages(rows, self.get_font())
+
+    def astream(self, rows: AsyncShoppingCartRows) -> AsyncIterator[bytes]:
+        return self.astream_pages(rows, self.get_font())
+
+    async def astream_pages(self,
+                            rows: AsyncShoppingCartRows,
+                            font: str) -> AsyncIterator[bytes]:
+        # Документ reportlab собирается целиком, поэтому строки корзины
+        # читаются до отправки первого куска.
+        for chunk in self.stream_pages([row async for row in rows], font):
+            yield chunk
+
+    def stream_pages(self,
+                     rows: ShoppingCartRows,
+                     font: str) -> Iterator[bytes]:
+        buffer = io.BytesIO()
+        canvas = Canvas(buffer, pagesize=A4)
+        canvas.setTitle(self.title)
+        _, height = A4
+
+        canvas.setFont(font, self.font_size + 4)
+        y = height - self.margin
+        canvas.drawString(self.margin, y, self.title)
+        y -= 2 * self.line_height
+        canvas.setFont(font, self.font_size)
+
+        for ingredient, amount, measurement_unit in rows:
+            if y < self.margin:
+                canvas.showPage()
+                canvas.setFont(font, self.font_size)
+                y = height - self.margin
+            canvas.drawString(
+                self.margin, y, f'- {ingredient}: {amount} {measurement_unit}')
+            y -= self.line_height
+
+        canvas.save()
+        buffer.seek(0)
+        while chunk := buffer.read(self.chunk_size):
+            yield chunk
+
+
+class ShoppingCartNegotiation(DefaultContentNegotiation):
+    # Клиенты API с Accept: application/json получают текстовый файл,
+    # как до появления выбора формата.
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            format = format_suffix or request.query_params.get(
+                self.settings.URL_FORMAT_OVERRIDE)
+            if format:
+                renderers = self.filter_renderers(renderers, format)
+            return renderers[0], renderers[0].media_type
+
+
+SHOPPING_CART_EXPORTERS: tuple[type[ShoppingCartExporter], ...] = (
+    TextExporter,
+    CSVExporter,
+    PDFExporter,
+)
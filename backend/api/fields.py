@@ -0,0 +1,34 @@
+from django.db.models.fields.files import FieldFile
+from rest_framework import serializers
+
+from api.images import IMAGE_DERIVATIVES, get_derivative_name
+
+
+class RecipeImageField(serializers.ImageField):
+    def __init__(self,
+                 derivative: str | None = None,
+                 list_derivative: str | None = None,
+                 **kwargs) -> None:
+        for name in (derivative, list_derivative):
+            assert name is None or name in IMAGE_DERIVATIVES, name
+        self.derivative = derivative
+        self.list_derivative = list_derivative
+        super().__init__(**kwargs)
+
+    def get_derivative(self) -> str | None:
+        if self.list_derivative and isinstance(
+                getattr(self.parent, 'parent', None),
+                serializers.ListSerializer):
+            return self.list_derivative
+        return self.derivative
+
+    def to_representation(self, value):
+        derivative = self.get_derivative()
+        if value and derivative and getattr(
+                value.instance, 'has_image_derivatives', False):
+            value = FieldFile(
+                value.instance,
+                value.field,
+                get_derivative_name(value.name, derivative)
+            )
+        return super().to_representation(value)
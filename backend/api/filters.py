@@ -1,20 +1,8 @@
 import django_filters
 
-from food.models import Recipe, Ingredient
-from api.services import (
-    get_user_fav_or_shopping_recipes_ids,
-    get_recipes_ids_with_same_tag,
-    get_tag_names,
-)
-
-
-class IngredientFilterSet(django_filters.FilterSet):
-    name = django_filters.CharFilter(
-        field_name='name', lookup_expr='startswith')
-
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+from food.models import Recipe
+from api.registries import get_tag_choices
+from api.services import get_recipes_ids_with_same_tag
 
 
 class RecipeFilterSet(django_filters.FilterSet):
@@ -22,7 +10,7 @@ class RecipeFilterSet(django_filters.FilterSet):
     is_in_shopping_cart = django_filters.NumberFilter(method='shopping_cart')
     tags = django_filters.MultipleChoiceFilter(
         method='by_tags',
-        choices=get_tag_names()
+        choices=get_tag_choices
     )
 
     class Meta:
@@ -38,18 +26,7 @@ class RecipeFilterSet(django_filters.FilterSet):
         return queryset.filter(id__in=get_recipes_ids_with_same_tag(value))
 
     def favorite(self, queryset, name, value):
-        if not self.request.user:
-            return queryset
-        favs = get_user_fav_or_shopping_recipes_ids(self.request.user)
-        if value:
-            return queryset.filter(id__in=favs)
-        return queryset.exclude(id__in=favs)
+        return queryset.filter(is_favorited=bool(value))
 
     def shopping_cart(self, queryset, name, value):
-        if not self.request.user:
-            return queryset
-        shopping_cart = get_user_fav_or_shopping_recipes_ids(
-            self.request.user, is_shopping_cart=True)
-        if value:
-            return queryset.filter(id__in=shopping_cart)
-        return queryset.exclude(id__in=shopping_cart)
+        return queryset.filter(is_in_shopping_cart=bool(value))
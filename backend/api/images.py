@@ -0,0 +1,96 @@
+import base64
+import binascii
+import io
+from pathlib import PurePosixPath
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from api.exceptions import (
+    ImageTooLargeError,
+    ImageTooManyPixelsError,
+    InvalidImageError
+)
+
+
+BASE64_CHUNK_SIZE: int = 64 * 1024
+SPOOL_MAX_SIZE: int = 1024 * 1024
+IMAGE_DERIVATIVES: dict[str, tuple[int, int]] = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+}
+WEBP_QUALITY: int = 80
+
+
+def get_decoded_size(encoded: str) -> int:
+    return len(encoded) // 4 * 3 - encoded[-2:].count('=')
+
+
+def decode_base64_image(encoded: str, name: str, max_size: int) -> File:
+    if not encoded or len(encoded) % 4:
+        raise InvalidImageError
+    if get_decoded_size(encoded) > max_size:
+        raise ImageTooLargeError
+
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        for start in range(0, len(encoded), BASE64_CHUNK_SIZE):
+            spool.write(base64.b64decode(
+                encoded[start:start + BASE64_CHUNK_SIZE], validate=True))
+    except binascii.Error:
+        spool.close()
+        raise InvalidImageError
+    spool.seek(0)
+    return File(spool, name=name)
+
+
+def check_image_limits(file: File, max_size: int, max_pixels: int) -> None:
+    if file.size > max_size:
+        raise ImageTooLargeError
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise ImageTooManyPixelsError
+    except OSError:
+        return
+    finally:
+        file.seek(0)
+    if width * height > max_pixels:
+        raise ImageTooManyPixelsError
+
+
+def get_derivative_name(name: str, derivative: str) -> str:
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}.{derivative}.webp'))
+
+
+def delete_derivatives(name: str) -> None:
+    for derivative in IMAGE_DERIVATIVES:
+        default_storage.delete(get_derivative_name(name, derivative))
+
+
+def make_derivatives(name: str) -> list[str]:
+    derivatives_names = []
+    with default_storage.open(name) as original:
+        with Image.open(original) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert(
+                    'RGBA' if 'A' in image.getbands() else 'RGB')
+
+            for derivative, size in IMAGE_DERIVATIVES.items():
+                derivative_image = image.copy()
+                derivative_image.thumbnail(size, Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                derivative_image.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+
+                derivative_name = get_derivative_name(name, derivative)
+                default_storage.delete(derivative_name)
+                default_storage.save(
+                    derivative_name, ContentFile(buffer.getvalue()))
+                derivatives_names.append(derivative_name)
+    return derivatives_names
@@ -0,0 +1,228 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterator
+
+from django.conf import settings
+
+
+COUNTER: str = 'counter'
+GAUGE: str = 'gauge'
+HISTOGRAM: str = 'histogram'
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS: tuple[float, ...] = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS: dict[str, tuple[str, str, tuple[float, ...]]] = {
+    'foodgram_requests_total': (
+        COUNTER, 'Количество запросов', ()),
+    'foodgram_request_duration_seconds': (
+        HISTOGRAM, 'Время обработки запроса', LATENCY_BUCKETS),
+    'foodgram_db_duration_seconds': (
+        HISTOGRAM, 'Время SQL-запросов за запрос', LATENCY_BUCKETS),
+    'foodgram_db_queries_total': (
+        COUNTER, 'Количество SQL-запросов', ()),
+    'foodgram_response_size_bytes': (
+        HISTOGRAM, 'Размер тела ответа', SIZE_BUCKETS),
+    'foodgram_cache_requests_total': (
+        COUNTER, 'Обращения к кэшам по результату', ()),
+    'foodgram_requests_in_flight': (
+        GAUGE, 'Запросы в обработке', ()),
+}
+
+INITIAL_SIZE: int = 64 * 1024
+HEADER = struct.Struct('i')
+VALUE = struct.Struct('d')
+
+Labels = dict[str, str]
+
+
+class MmapedValues:
+    # Файл воркера: занятая длина, затем записи [длина ключа][ключ,
+    # выровненный до 8 байт][double]. Пишет только процесс-владелец.
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions: dict[str, int] = {
+            key: position for key, _, position in read_records(self._mmap)
+        }
+        self._used = HEADER.unpack_from(self._mmap, 0)[0] or HEADER.size
+
+    def _allocate(self, key: str) -> int:
+        encoded = key.encode()
+        padded = len(encoded) + (8 - (HEADER.size + len(encoded)) % 8) % 8
+        record_size = HEADER.size + padded + VALUE.size
+        while self._used + record_size > self._capacity:
+            self._capacity *= 2
+            self._mmap.close()
+            self._file.truncate(self._capacity)
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+        struct.pack_into(
+            f'i{padded}sd', self._mmap, self._used,
+            len(encoded), encoded, 0.0)
+        self._used += record_size
+        HEADER.pack_into(self._mmap, 0, self._used)
+        position = self._used - VALUE.size
+        self._positions[key] = position
+        return position
+
+    def add(self, key: str, amount: float) -> None:
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._allocate(key)
+            value = VALUE.unpack_from(self._mmap, position)[0]
+            VALUE.pack_into(self._mmap, position, value + amount)
+
+
+def read_records(buffer) -> Iterator[tuple[str, float, int]]:
+    used = min(HEADER.unpack_from(buffer, 0)[0], len(buffer))
+    position = HEADER.size
+    while position < used:
+        length = HEADER.unpack_from(buffer, position)[0]
+        position += HEADER.size
+        key = bytes(buffer[position:position + length]).decode()
+        position += length + (8 - (HEADER.size + length) % 8) % 8
+        yield key, VALUE.unpack_from(buffer, position)[0], position
+        position += VALUE.size
+
+
+@lru_cache(maxsize=4096)
+def get_key(name: str, labels: tuple[tuple[str, str], ...]) -> str:
+    return json.dumps([name, [(label, str(value)) for label, value in labels]])
+
+
+class MetricsWriter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._files: dict[str, MmapedValues] = {}
+
+    def get_file(self, kind: str) -> MmapedValues | None:
+        if not settings.METRICS_DIR:
+            return None
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._files = {}
+                    self._pid = pid
+        values = self._files.get(kind)
+        if values is None:
+            with self._lock:
+                values = self._files.get(kind)
+                if values is None:
+                    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                    path = os.path.join(
+                        settings.METRICS_DIR, f'{kind}_{pid}.db')
+                    if kind == GAUGE and os.path.exists(path):
+                        os.remove(path)
+                    values = MmapedValues(path)
+                    self._files[kind] = values
+        return values
+
+    def add(self, kind: str, name: str, labels: Labels, amount: float) -> None:
+        values = self.get_file(kind)
+        if values is not None:
+            values.add(get_key(name, tuple(sorted(labels.items()))), amount)
+
+
+writer = MetricsWriter()
+
+
+def inc(name: str, labels: Labels, amount: float = 1) -> None:
+    writer.add(COUNTER, name, labels, amount)
+
+
+def add_gauge(name: str, labels: Labels, amount: float) -> None:
+    writer.add(GAUGE, name, labels, amount)
+
+
+def observe(name: str, labels: Labels, value: float) -> None:
+    for bound in METRICS[name][2]:
+        if value <= bound:
+            writer.add(COUNTER, f'{name}_bucket', {**labels, 'le': bound}, 1)
+    writer.add(COUNTER, f'{name}_bucket', {**labels, 'le': '+Inf'}, 1)
+    writer.add(COUNTER, f'{name}_sum', labels, value)
+    writer.add(COUNTER, f'{name}_count', labels, 1)
+
+
+def record_cache(cache_name: str, hit: bool) -> None:
+    inc('foodgram_cache_requests_total',
+        {'cache': cache_name, 'result': 'hit' if hit else 'miss'})
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect() -> dict[tuple[str, tuple], float]:
+    samples: dict[tuple[str, tuple], float] = defaultdict(float)
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+        kind, _, pid = os.path.basename(path)[:-3].partition('_')
+        if kind == GAUGE and not is_alive(int(pid)):
+            continue
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                continue
+            with mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for key, value, _ in read_records(buffer):
+                    name, labels = json.loads(key)
+                    samples[(name, tuple(map(tuple, labels)))] += value
+    return samples
+
+
+def escape_label(value: str) -> str:
+    return value.replace(
+        '\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in labels) + '}'
+
+
+def get_sort_key(sample: tuple[str, tuple]) -> tuple:
+    name, labels = sample
+    labels = dict(labels)
+    bound = labels.pop('le', None)
+    return name, sorted(labels.items()), float(bound or 0)
+
+
+def render() -> str:
+    samples = collect()
+    ordered = sorted(samples, key=get_sort_key)
+    lines = []
+    for name, (kind, help_text, _) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for sample in ordered:
+            sample_name, labels = sample
+            if sample_name == name or (
+                    kind == HISTOGRAM and sample_name in (
+                        f'{name}_bucket', f'{name}_sum', f'{name}_count')):
+                lines.append(
+                    f'{sample_name}{format_labels(labels)} {samples[sample]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,205 @@
+import logging
+import time
+from contextlib import ExitStack
+from typing import AsyncIterator, Iterator
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async
+)
+from django.conf import settings
+from django.db import connections
+
+from api.budgets import get_query_budget
+from api.metrics import add_gauge, inc, observe
+from api.timing import RequestTiming, current_timing, use_timing
+
+
+logger = logging.getLogger('api.timing')
+
+
+def get_route(request) -> str | None:
+    resolver_match = getattr(request, 'resolver_match', None)
+    return resolver_match.view_name if resolver_match else None
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timing = RequestTiming()
+        started = time.perf_counter()
+        add_gauge('foodgram_requests_in_flight', {}, 1)
+        stack = ExitStack()
+        try:
+            with use_timing(timing):
+                self.wrap_connections(stack, timing)
+                response = self.get_response(request)
+        except BaseException:
+            self.close(stack)
+            raise
+        if response.streaming:
+            return self.wrap_streaming(
+                request, response, stack, timing, started)
+        self.close(stack)
+        return self.finish(request, response, timing, started)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        started = time.perf_counter()
+        add_gauge('foodgram_requests_in_flight', {}, 1)
+        stack = ExitStack()
+        try:
+            with use_timing(timing):
+                # Соединения потоковые: async ORM и синхронные view
+                # запроса работают в его потоке sync_to_async, там же
+                # обёртки execute снимаются в aclose.
+                await sync_to_async(self.wrap_connections)(stack, timing)
+                response = await self.get_response(request)
+        except BaseException:
+            await self.aclose(stack)
+            raise
+        if response.streaming:
+            return self.wrap_streaming(
+                request, response, stack, timing, started)
+        await self.aclose(stack)
+        return self.finish(request, response, timing, started)
+
+    def wrap_streaming(self,
+                       request,
+                       response,
+                       stack: ExitStack,
+                       timing: RequestTiming,
+                       started: float):
+        # Синхронный итератор Django под ASGI читает через
+        # sync_to_async, то есть тоже в потоке запроса.
+        stream = self.astream if response.is_async else self.stream
+        response.streaming_content = stream(
+            request, response, response.streaming_content,
+            stack, timing, started)
+        return response
+
+    # Тело потокового ответа читается уже после выхода из middleware,
+    # поэтому учёт запроса закрывается, когда итератор исчерпан или
+    # закрыт сервером. Server-Timing к этому моменту уже не отправить:
+    # для таких ответов заголовка нет, а лог, бюджет и метрики
+    # включают запросы, сделанные во время отдачи тела.
+    def stream(self,
+               request,
+               response,
+               content: Iterator[bytes],
+               stack: ExitStack,
+               timing: RequestTiming,
+               started: float) -> Iterator[bytes]:
+        size = 0
+        try:
+            while True:
+                with use_timing(timing):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.close(stack)
+            self.finish(request, response, timing, started, size)
+
+    async def astream(self,
+                      request,
+                      response,
+                      content: AsyncIterator[bytes],
+                      stack: ExitStack,
+                      timing: RequestTiming,
+                      started: float) -> AsyncIterator[bytes]:
+        size = 0
+        try:
+            while True:
+                with use_timing(timing):
+                    chunk = await anext(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            await self.aclose(stack)
+            self.finish(request, response, timing, started, size)
+
+    def close(self, stack: ExitStack) -> None:
+        stack.close()
+        add_gauge('foodgram_requests_in_flight', {}, -1)
+
+    async def aclose(self, stack: ExitStack) -> None:
+        await sync_to_async(stack.close)()
+        add_gauge('foodgram_requests_in_flight', {}, -1)
+
+    def wrap_connections(self,
+                         stack: ExitStack,
+                         timing: RequestTiming) -> None:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timing))
+
+    def finish(self,
+               request,
+               response,
+               timing: RequestTiming,
+               started: float,
+               size: int | None = None):
+        finished = time.perf_counter()
+        timing.total = finished - started
+        if timing.view_started is not None:
+            timing.view = finished - timing.view_started
+
+        if settings.SERVER_TIMING_HEADER and not response.streaming:
+            response['Server-Timing'] = timing.as_header()
+        self.log(request, response, timing)
+        self.record(request, response, timing, size)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = current_timing.get()
+        if timing is not None:
+            timing.view_started = time.perf_counter()
+
+    def log(self, request, response, timing: RequestTiming) -> None:
+        route = get_route(request)
+        budget = get_query_budget(route, request.method)
+        fields = {
+            'route': route,
+            'method': request.method,
+            'status': response.status_code,
+            'budget': budget,
+            **timing.as_log_fields(),
+        }
+        if budget is not None and timing.queries > budget:
+            logger.warning('query budget exceeded', extra=fields)
+        else:
+            logger.info('request', extra=fields)
+
+    def record(self,
+               request,
+               response,
+               timing: RequestTiming,
+               size: int | None = None) -> None:
+        labels = {
+            'route': get_route(request) or 'unmatched',
+            'method': request.method,
+        }
+        inc('foodgram_requests_total',
+            {**labels, 'status': response.status_code})
+        observe('foodgram_request_duration_seconds', labels, timing.total)
+        observe('foodgram_db_duration_seconds', labels, timing.db)
+        inc('foodgram_db_queries_total', labels, timing.queries)
+        if not response.streaming:
+            size = len(response.content)
+        observe('foodgram_response_size_bytes', labels, size)
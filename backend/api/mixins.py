@@ -0,0 +1,205 @@
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from api.cache import aget_version, get_version
+from api.metrics import record_cache
+
+
+ASYNC_METHODS: tuple[str, ...] = ('GET', 'HEAD')
+
+
+class AsyncReadMixin:
+    # GET-запросы действий из async_actions обслуживает обработчик
+    # a<действие> на async ORM, остальные методы идут в синхронный DRF.
+    async_actions: tuple[str, ...] = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        action = actions.get('get')
+        if not settings.ASYNC_READ_VIEWS or action not in cls.async_actions:
+            return view
+
+        async def async_view(request, *args, **kwargs):
+            if request.method not in ASYNC_METHODS:
+                return await sync_to_async(view)(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = {'get': action, 'head': action}
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        return update_wrapper(async_view, view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+            handler = getattr(self, f'a{self.action}')
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs)
+        return self.response
+
+    async def aperform_authentication(self, request: Request) -> None:
+        # Разбор заголовка и поиск токена остаются за DRF, в потоке
+        # выполняется только синхронный authenticate().
+        for authenticator in request.authenticators:
+            try:
+                user_auth = await sync_to_async(
+                    authenticator.authenticate)(request)
+            except APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth
+                return
+
+        request._not_authenticated()
+
+    async def afilter_queryset(self, queryset):
+        # Фильтры django-filter валидируют значения запросами к БД.
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError,
+                ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def aget_serializer_context(self, objects: list) -> dict:
+        return self.get_serializer_context()
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        objects = page if page is not None else [
+            obj async for obj in queryset
+        ]
+        serializer = self.get_serializer(
+            objects,
+            many=True,
+            context=await self.aget_serializer_context(objects)
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(
+            instance, context=await self.aget_serializer_context([instance]))
+        return Response(serializer.data)
+
+
+class CatalogListMixin:
+    # Каталоги публичные: без аутентификации ответ 304 не трогает БД.
+    authentication_classes = ()
+    catalog: str
+    catalog_bodies: dict[str, tuple[int, bytes]] = {}
+
+    def get_cached_catalog_body(self, version: int) -> bytes | None:
+        cached = self.catalog_bodies.get(self.catalog)
+        is_hit = cached is not None and cached[0] == version
+        record_cache('catalog_body', is_hit)
+        return cached[1] if is_hit else None
+
+    def render_catalog_body(self, version: int, objects) -> bytes:
+        serializer = self.get_serializer(objects, many=True)
+        body = JSONRenderer().render(serializer.data)
+        self.catalog_bodies[self.catalog] = (version, body)
+        return body
+
+    def get_catalog_body(self, version: int) -> bytes:
+        body = self.get_cached_catalog_body(version)
+        if body is None:
+            body = self.render_catalog_body(
+                version, self.filter_queryset(self.get_queryset()))
+        return body
+
+    async def aget_catalog_body(self, version: int) -> bytes:
+        body = self.get_cached_catalog_body(version)
+        if body is None:
+            queryset = await self.afilter_queryset(self.get_queryset())
+            body = self.render_catalog_body(
+                version, [obj async for obj in queryset])
+        return body
+
+    def get_catalog_etag(self, version: int) -> str:
+        return quote_etag(f'{self.catalog}-{version}')
+
+    def is_not_modified(self, request, etag: str) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        is_not_modified = bool(
+            if_none_match) and etag in parse_etags(if_none_match)
+        if if_none_match:
+            record_cache('catalog_etag', is_not_modified)
+        return is_not_modified
+
+    def get_catalog_response(self,
+                             etag: str,
+                             body: bytes | None) -> HttpResponse:
+        if body is None:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response.headers['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        version = get_version(self.catalog)
+        etag = self.get_catalog_etag(version)
+        body = None
+        if not self.is_not_modified(request, etag):
+            body = self.get_catalog_body(version)
+        return self.get_catalog_response(etag, body)
+
+    async def alist(self, request, *args, **kwargs):
+        if request.query_params:
+            return await super().alist(request, *args, **kwargs)
+
+        version = await aget_version(self.catalog)
+        etag = self.get_catalog_etag(version)
+        body = None
+        if not self.is_not_modified(request, etag):
+            body = await self.aget_catalog_body(version)
+        return self.get_catalog_response(etag, body)
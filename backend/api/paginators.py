@@ -1,5 +1,197 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class LimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)))
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.page.object_list = [
+            obj async for obj in self.page.object_list
+        ]
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param: str = 'cursor'
+    page_size_query_param: str = 'limit'
+    page_size: int = api_settings.PAGE_SIZE
+    max_page_size: int = 100
+    ordering: tuple[str, ...] = ('-created_at', '-id')
+    invalid_cursor_message: str = 'Неверный курсор'
+
+    def get_ordering(self, view) -> tuple[str, ...]:
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+    def get_page_size(self, request: Request) -> int:
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size and page_size.isdigit() and int(page_size) > 0:
+            return min(int(page_size), self.max_page_size)
+        return self.page_size
+
+    def decode_cursor(self,
+                      request: Request,
+                      queryset: QuerySet) -> tuple[list, bool] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = [
+                queryset.model._meta.get_field(
+                    field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, cursor['v'],
+                                        strict=True)
+            ]
+            return values, bool(cursor['r'])
+        except (binascii.Error, ValueError, KeyError, TypeError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            values.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value)
+        cursor = json.dumps({'v': values, 'r': int(reverse)})
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            base64.urlsafe_b64encode(cursor.encode()).decode()
+        )
+
+    def get_seek_filter(self, values: list, reverse: bool) -> Q:
+        lookups = []
+        for field in self.ordering:
+            descending = field.startswith('-')
+            lookups.append(
+                (field.lstrip('-'), 'gt' if descending == reverse else 'lt'))
+
+        first_field, first_lookup = lookups[0]
+        seek = Q()
+        for position, (field, lookup) in enumerate(lookups):
+            equal = {
+                name: value
+                for (name, _), value in zip(lookups[:position], values)
+            }
+            seek |= Q(**equal, **{f'{field}__{lookup}': values[position]})
+
+        bound = {'lt': 'lte', 'gt': 'gte'}[first_lookup]
+        return Q(**{f'{first_field}__{bound}': values[0]}) & seek
+
+    def get_page_queryset(self,
+                          queryset: QuerySet,
+                          request: Request,
+                          view=None) -> QuerySet:
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.limit = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request, queryset)
+        self.reverse = self.cursor is not None and self.cursor[1]
+
+        if self.reverse:
+            ordering = [
+                field.lstrip('-') if field.startswith('-') else f'-{field}'
+                for field in self.ordering
+            ]
+        else:
+            ordering = self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_seek_filter(*self.cursor))
+        return queryset[:self.limit + 1]
+
+    def get_page(self, results: list) -> list:
+        cursor, reverse = self.cursor, self.reverse
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+
+        self.next = self.previous = None
+        if results:
+            if has_more or reverse:
+                self.next = self.encode_cursor(results[-1], reverse=False)
+            if (has_more and reverse) or (cursor is not None and not reverse):
+                self.previous = self.encode_cursor(results[0], reverse=True)
+        elif cursor is not None:
+            self.previous = remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param)
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(
+            list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.get_page([
+            obj async for obj in self.get_page_queryset(
+                queryset, request, view)
+        ])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+
+class LimitOrCursorPagination(LimitPagination):
+    cursor_pagination_class = KeysetPagination
+
+    def get_cursor_paginator(self,
+                             request: Request) -> KeysetPagination | None:
+        if self.cursor_pagination_class.cursor_query_param in (
+                request.query_params):
+            return self.cursor_pagination_class()
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = self.get_cursor_paginator(request)
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = self.get_cursor_paginator(request)
+        if self.cursor_paginator is not None:
+            return await self.cursor_paginator.apaginate_queryset(
+                queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
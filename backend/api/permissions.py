@@ -0,0 +1,26 @@
+from functools import lru_cache
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+@lru_cache(maxsize=None)
+def get_networks(
+        networks: tuple[str, ...]) -> tuple[IPv4Network | IPv6Network, ...]:
+    return tuple(ip_network(network.strip()) for network in networks)
+
+
+class IsStaffOrInternalIP(BasePermission):
+    def has_permission(self, request, view) -> bool:
+        if request.user and request.user.is_staff:
+            return True
+        try:
+            address = ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return False
+        return any(
+            address in network
+            for network in get_networks(
+                tuple(settings.METRICS_ALLOWED_NETWORKS))
+        )
@@ -0,0 +1,54 @@
+import threading
+from typing import Iterable
+
+from food.models import Tag
+from api.cache import TAGS_CATALOG, get_version
+
+
+class TagRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._tags: dict[int, Tag] = {}
+        self._ids_by_slug: dict[str, int] = {}
+
+    def _load(self) -> None:
+        version = get_version(TAGS_CATALOG)
+        if self._version == version:
+            return
+        with self._lock:
+            if self._version == version:
+                return
+            tags = list(Tag.objects.all())
+            self._tags = {tag.id: tag for tag in tags}
+            self._ids_by_slug = {tag.slug: tag.id for tag in tags}
+            self._version = version
+
+    def invalidate(self) -> None:
+        self._version = None
+
+    def get_choices(self) -> list[tuple[str, str]]:
+        self._load()
+        return [(tag.slug, tag.name) for tag in self._tags.values()]
+
+    def get_ids(self, slugs: Iterable[str]) -> list[int]:
+        self._load()
+        return [
+            self._ids_by_slug[slug]
+            for slug in slugs if slug in self._ids_by_slug
+        ]
+
+    def get_tags(self, ids: Iterable[int]) -> list[Tag]:
+        self._load()
+        return [self._tags[tag_id] for tag_id in ids if tag_id in self._tags]
+
+    def exists(self, tag_id: int) -> bool:
+        self._load()
+        return tag_id in self._tags
+
+
+tag_registry = TagRegistry()
+
+
+def get_tag_choices() -> list[tuple[str, str]]:
+    return tag_registry.get_choices()
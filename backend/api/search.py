@@ -0,0 +1,132 @@
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Iterable
+
+from django.db.models.query import QuerySet
+
+from food.models import Ingredient
+from api.cache import INGREDIENTS_CATALOG, aget_version, get_version
+
+
+IngredientRow = dict[str, int | str]
+
+SEARCH_DEFAULT_LIMIT: int = 50
+SEARCH_MAX_LIMIT: int = 200
+
+
+def normalize(value: str) -> str:
+    return value.casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._snapshot: tuple[
+            list[tuple[str, int]], dict[int, IngredientRow]
+        ] = ([], {})
+
+    @staticmethod
+    def _get_queryset(ids: Iterable[int] | None = None) -> QuerySet:
+        queryset = Ingredient.objects.all()
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        return queryset.order_by().values_list(
+            'id', 'name', 'measurement_unit__name')
+
+    @staticmethod
+    def _make_row(values: tuple[int, str, str]) -> IngredientRow:
+        ingredient_id, name, unit = values
+        return {'id': ingredient_id, 'name': name, 'measurement_unit': unit}
+
+    def _fetch(self, ids: Iterable[int] | None = None) -> list[IngredientRow]:
+        return [self._make_row(values) for values in self._get_queryset(ids)]
+
+    def _set_snapshot(self, rows: list[IngredientRow], version: int) -> None:
+        self._snapshot = (
+            sorted((normalize(row['name']), row['id']) for row in rows),
+            {row['id']: row for row in rows},
+        )
+        self._version = version
+
+    def _load(self) -> None:
+        version = get_version(INGREDIENTS_CATALOG)
+        if self._version == version:
+            return
+        with self._lock:
+            if self._version == version:
+                return
+            self._set_snapshot(self._fetch(), version)
+
+    async def _aload(self) -> None:
+        version = await aget_version(INGREDIENTS_CATALOG)
+        if self._version == version:
+            return
+        rows = [
+            self._make_row(values) async for values in self._get_queryset()
+        ]
+        with self._lock:
+            if self._version != version:
+                self._set_snapshot(rows, version)
+
+    def refresh(self,
+                ids: Iterable[int],
+                previous_version: int,
+                version: int) -> None:
+        with self._lock:
+            if self._version != previous_version:
+                return
+            ids = set(ids)
+            keys, rows = list(self._snapshot[0]), dict(self._snapshot[1])
+            for ingredient_id in ids:
+                row = rows.pop(ingredient_id, None)
+                if row is not None:
+                    keys.remove((normalize(row['name']), row['id']))
+            for row in self._fetch(ids):
+                rows[row['id']] = row
+                insort(keys, (normalize(row['name']), row['id']))
+            self._snapshot = (keys, rows)
+            self._version = version
+
+    def invalidate(self) -> None:
+        self._version = None
+
+    def search(self,
+               query: str,
+               limit: int = SEARCH_DEFAULT_LIMIT) -> list[IngredientRow]:
+        self._load()
+        return self._find(query, limit)
+
+    async def asearch(self,
+                      query: str,
+                      limit: int = SEARCH_DEFAULT_LIMIT
+                      ) -> list[IngredientRow]:
+        await self._aload()
+        return self._find(query, limit)
+
+    def _find(self, query: str, limit: int) -> list[IngredientRow]:
+        keys, rows = self._snapshot
+        query = normalize(query)
+
+        start = end = bisect_left(keys, (query,))
+        while (end < len(keys) and end - start < limit
+               and keys[end][0].startswith(query)):
+            end += 1
+        found = [ingredient_id for _, ingredient_id in keys[start:end]]
+
+        # Подстроку ищет перебор каталога: он берёт только недостающие
+        # до limit строки и останавливается, как только их набрал.
+        if len(found) < limit:
+            found.extend(islice(
+                (
+                    ingredient_id for key, ingredient_id in keys
+                    if query in key and not key.startswith(query)
+                ),
+                limit - len(found)
+            ))
+
+        return [rows[ingredient_id] for ingredient_id in found]
+
+
+ingredient_index = IngredientIndex()
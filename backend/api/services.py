@@ -1,17 +1,31 @@
+from collections import Counter
+from itertools import islice
+from typing import AsyncIterator, Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Model
+from django.db import connections, router, transaction
+from django.db.models import (
+    Exists, F, Model, OuterRef, Sum, Value, Window
+)
+from django.db.models.constants import OnConflict
+from django.db.models.functions import RowNumber
 from django.db.models.query import QuerySet
 from django.shortcuts import get_object_or_404
-from django.http import Http404
 
 from users.models import UserSubs
 from food.models import (
+    FavoriteRecipe,
+    Ingredient,
     RecipeIngredient,
     RecipeTag,
-    Ingredient,
     Recipe,
-    Tag
+    ShoppingCart,
 )
+from api.cache import RECIPES_CATALOG, bump_version, bump_version_on_commit
+from api.images import delete_derivatives, make_derivatives
+from api.registries import tag_registry
 from api.exceptions import (
     AlreadySubscribedError,
     NotSubscribedError,
@@ -21,25 +35,60 @@ from api.exceptions import (
 
 User = get_user_model()
 
+SUBS_RECIPES_DEFAULT_LIMIT: int = 10
+SUBS_RECIPES_MAX_LIMIT: int = 100
+SHOPPING_CART_CHUNK_SIZE: int = 2000
+
 
 def get_all_objects(model: Model) -> QuerySet:
     return model.objects.all()
 
 
-def subscribe(user: User, sub: User) -> QuerySet:
+def change_counter(model: Model, obj_id: int, field: str, delta: int) -> None:
+    model.objects.filter(id=obj_id).update(**{field: F(field) + delta})
+
+
+def insert_or_ignore(model: Model, **values) -> bool:
+    connection = connections[router.db_for_write(model)]
+    fields = [model._meta.get_field(name) for name in values]
+    params = [
+        field.get_db_prep_save(value, connection)
+        for field, value in zip(fields, values.values())
+    ]
+    sql = '{} {} ({}) VALUES ({}) {}'.format(
+        connection.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(
+            connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+        connection.ops.on_conflict_suffix_sql(
+            fields, OnConflict.IGNORE, None, None),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount > 0
+
+
+def subscribe(user: User, sub: User) -> None:
     if user.id == sub.id:
         raise SelfSubscriptionError
-    if UserSubs.objects.filter(user_id=user.id, sub_id=sub.id).exists():
-        raise AlreadySubscribedError
-    return UserSubs.objects.get_or_create(user=user, sub=sub)
+    with transaction.atomic():
+        if not insert_or_ignore(UserSubs, user_id=user.id, sub_id=sub.id):
+            raise AlreadySubscribedError
+        change_counter(User, sub.id, 'subscribers_count', 1)
 
 
-def unsubscribe(user: User, sub_id: int) -> QuerySet:
-    sub = get_object_or_404(User, id=sub_id)
-    try:
-        get_object_or_404(UserSubs, user=user, sub_id=sub).delete()
-    except Http404:
-        raise NotSubscribedError
+def unsubscribe(user: User, sub_id: int) -> None:
+    with transaction.atomic():
+        deleted, _ = UserSubs.objects.filter(
+            user_id=user.id,
+            sub_id=sub_id
+        ).delete()
+        if deleted:
+            change_counter(User, sub_id, 'subscribers_count', -deleted)
+            return
+    get_object_or_404(User, id=sub_id)
+    raise NotSubscribedError
 
 
 def get_subs_ids(user: User) -> list[int]:
@@ -48,51 +97,115 @@ def get_subs_ids(user: User) -> list[int]:
     return user.user_subscriptions.all().values_list('sub_id', flat=True)
 
 
+def annotate_is_subscribed(queryset: QuerySet,
+                           user: User,
+                           sub_field: str = 'pk',
+                           name: str = 'is_subscribed') -> QuerySet:
+    if not user.is_authenticated:
+        return queryset.annotate(**{name: Value(False)})
+    return queryset.annotate(**{
+        name: Exists(
+            UserSubs.objects.filter(
+                user_id=user.id, sub_id=OuterRef(sub_field))
+        )
+    })
+
+
 def get_subscriptions(user: User) -> QuerySet:
     return User.objects.filter(id__in=get_subs_ids(user))
 
 
-def get_recipe_ingredients_with_amounts(
-        recipe_id: int) -> list[QuerySet, dict[int, int]]:
-    ingredients: QuerySet = (
-        Ingredient.objects.prefetch_related(
-            'recipe_ingredient'
-        ).filter(
-            recipe_ingredient__recipe_id=recipe_id
-        )
+def get_ingredients_rows() -> QuerySet:
+    return Ingredient.objects.values('id', 'name', 'measurement_unit__name')
+
+
+def get_recipes_ingredients_rows(recipes_ids: list[int]) -> QuerySet:
+    return RecipeIngredient.objects.filter(
+        recipe_id__in=recipes_ids
+    ).order_by(
+        'ingredient__name'
+    ).values(
+        'recipe_id',
+        'ingredient_id',
+        'ingredient__name',
+        'ingredient__measurement_unit__name',
+        'amount',
     )
 
-    ingredients_amounts: list[tuple[int, int]] = (
-        RecipeIngredient.objects.filter(
-            ingredient_id__in=ingredients.values_list('id', flat=True),
-            recipe_id=recipe_id
-        ).values_list('ingredient_id', 'amount')
+
+def group_recipes_ingredients(
+        recipes_ids: list[int],
+        rows: Iterable[dict]) -> dict[int, list[dict[str, int | str]]]:
+    recipes_ingredients: dict[int, list[dict[str, int | str]]] = {
+        recipe_id: [] for recipe_id in recipes_ids
+    }
+    for row in rows:
+        recipes_ingredients[row.pop('recipe_id')].append(row)
+
+    return recipes_ingredients
+
+
+def get_recipes_ingredients(
+        recipes_ids: list[int]) -> dict[int, list[dict[str, int | str]]]:
+    return group_recipes_ingredients(
+        recipes_ids, get_recipes_ingredients_rows(recipes_ids))
+
+
+async def aget_recipes_ingredients(
+        recipes_ids: list[int]) -> dict[int, list[dict[str, int | str]]]:
+    return group_recipes_ingredients(
+        recipes_ids,
+        [row async for row in get_recipes_ingredients_rows(recipes_ids)]
     )
 
-    amounts: dict[int, int] = {}
-    for ingredient_id, amount in ingredients_amounts:
-        amounts[ingredient_id] = amount
 
-    return ingredients, amounts
+def get_duplicate_ids(ids: list[int]) -> list[int]:
+    return sorted(
+        obj_id for obj_id, count in Counter(ids).items() if count > 1)
 
 
-def get_available_ids(model: Model) -> list[int]:
-    return model.objects.all().values_list('id', flat=True)
+def get_missing_ids(model: Model, ids: list[int]) -> list[int]:
+    existing_ids = set(
+        model.objects.filter(id__in=set(ids)).values_list('id', flat=True))
+    return sorted(set(ids) - existing_ids)
 
 
 def add_ingredients_to_recipe(
         edit: bool,
         recipe: Recipe,
         ingredients_amounts: list[dict[str, int]]) -> None:
+    amounts = {ing['id']: ing['amount'] for ing in ingredients_amounts}
+    existing: dict[int, RecipeIngredient] = {}
     if edit:
-        RecipeIngredient.objects.filter(recipe_id=recipe.id).delete()
-
+        existing = {
+            row.ingredient_id: row
+            for row in RecipeIngredient.objects.filter(recipe_id=recipe.id)
+        }
+
+    stale_ids = [
+        row.id for ingredient_id, row in existing.items()
+        if ingredient_id not in amounts
+    ]
+    changed = []
+    for ingredient_id, amount in amounts.items():
+        row = existing.get(ingredient_id)
+        if row is not None and row.amount != amount:
+            row.amount = amount
+            changed.append(row)
+
+    if stale_ids:
+        RecipeIngredient.objects.filter(id__in=stale_ids).delete()
+    if changed:
+        RecipeIngredient.objects.bulk_update(changed, ('amount',))
     RecipeIngredient.objects.bulk_create(
         [
             RecipeIngredient(
                 recipe=recipe,
-                ingredient_id=ing['id'],
-                amount=ing['amount']) for ing in ingredients_amounts
+                ingredient_id=ingredient_id,
+                amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing
         ]
     )
 
@@ -100,77 +213,251 @@ def add_ingredients_to_recipe(
 def add_tags_to_recipe(edit: bool,
                        recipe: Recipe,
                        tags_ids: list[int]) -> None:
+    existing_ids: set[int] = set()
     if edit:
-        RecipeTag.objects.filter(recipe_id=recipe.id).delete()
+        existing_ids = set(
+            RecipeTag.objects.filter(
+                recipe_id=recipe.id
+            ).values_list('tag_id', flat=True)
+        )
 
+    stale_ids = existing_ids - set(tags_ids)
+    if stale_ids:
+        RecipeTag.objects.filter(
+            recipe_id=recipe.id,
+            tag_id__in=stale_ids
+        ).delete()
     RecipeTag.objects.bulk_create(
-        [RecipeTag(recipe=recipe, tag_id=tag_id) for tag_id in tags_ids]
+        [
+            RecipeTag(recipe=recipe, tag_id=tag_id)
+            for tag_id in dict.fromkeys(tags_ids)
+            if tag_id not in existing_ids
+        ]
     )
 
 
+def make_recipe_image_derivatives(recipe_id: int, image_name: str) -> bool:
+    try:
+        make_derivatives(image_name)
+    except (OSError, ValueError):
+        return False
+    updated = Recipe.objects.filter(
+        id=recipe_id,
+        image=image_name
+    ).update(has_image_derivatives=True)
+    if updated:
+        # Кэшированные списки ещё ссылаются на оригинал картинки.
+        bump_version(RECIPES_CATALOG)
+    return bool(updated)
+
+
+def make_recipe_image_derivatives_on_commit(recipe: Recipe) -> None:
+    # Ресайз идёт после коммита в воркере запроса и удлиняет ответ на
+    # время работы Pillow. С IMAGE_DERIVATIVES_ON_REQUEST=False копии
+    # создаёт периодический make_image_derivatives, а до того API
+    # отдаёт оригинал.
+    if not settings.IMAGE_DERIVATIVES_ON_REQUEST:
+        return
+    recipe_id, image_name = recipe.id, recipe.image.name
+    transaction.on_commit(
+        lambda: make_recipe_image_derivatives(recipe_id, image_name))
+
+
 def create_recipe(author_id: int,
                   ingredients: list[dict[str, int]],
                   tags_ids: list[int],
                   **kwargs) -> Recipe:
-    recipe_instance = Recipe.objects.create(
-        author_id=author_id,
-        **kwargs
-    )
+    with transaction.atomic():
+        recipe_instance = Recipe.objects.create(
+            author_id=author_id,
+            **kwargs
+        )
 
-    add_ingredients_to_recipe(False, recipe_instance, ingredients)
-    add_tags_to_recipe(False, recipe_instance, tags_ids)
+        add_ingredients_to_recipe(False, recipe_instance, ingredients)
+        add_tags_to_recipe(False, recipe_instance, tags_ids)
+        make_recipe_image_derivatives_on_commit(recipe_instance)
+        bump_version_on_commit(RECIPES_CATALOG)
 
     return recipe_instance
 
 
-def get_user_recipes(user_id: int) -> QuerySet:
-    return Recipe.objects.filter(author_id=user_id)
+def update_recipe(recipe: Recipe,
+                  ingredients: list[dict[str, int]] | None = None,
+                  tags_ids: list[int] | None = None,
+                  **kwargs) -> Recipe:
+    old_image_name = recipe.image.name
+    with transaction.atomic():
+        for field, value in kwargs.items():
+            setattr(recipe, field, value)
+        if 'image' in kwargs:
+            recipe.has_image_derivatives = False
+        recipe.save()
+        if old_image_name and old_image_name != recipe.image.name:
+            transaction.on_commit(
+                lambda: delete_derivatives(old_image_name))
+
+        # PATCH без ingredients или tags не трогает связанные строки.
+        if ingredients is not None:
+            add_ingredients_to_recipe(True, recipe, ingredients)
+        if tags_ids is not None:
+            add_tags_to_recipe(True, recipe, tags_ids)
+        if 'image' in kwargs:
+            make_recipe_image_derivatives_on_commit(recipe)
+        bump_version_on_commit(RECIPES_CATALOG)
+
+    return recipe
+
+
+def delete_recipe(recipe: Recipe) -> None:
+    with transaction.atomic():
+        recipe.delete()
+        bump_version_on_commit(RECIPES_CATALOG)
+
+
+def add_recipe_to_favorites(user: User, recipe: Recipe) -> bool:
+    with transaction.atomic():
+        is_created = insert_or_ignore(
+            FavoriteRecipe,
+            user_id=user.id,
+            recipe_id=recipe.id
+        )
+        if is_created:
+            change_counter(Recipe, recipe.id, 'favorites_count', 1)
+    return is_created
+
+
+def remove_recipe_from_favorites(user: User, recipe_id: int) -> bool:
+    with transaction.atomic():
+        deleted, _ = FavoriteRecipe.objects.filter(
+            user_id=user.id,
+            recipe_id=recipe_id
+        ).delete()
+        if deleted:
+            change_counter(Recipe, recipe_id, 'favorites_count', -deleted)
+    return bool(deleted)
 
 
-def get_user_fav_or_shopping_recipes_ids(
-        user: User, is_shopping_cart: bool = False) -> list[int]:
+def add_recipe_to_shopping_cart(user: User, recipe: Recipe) -> bool:
+    return insert_or_ignore(
+        ShoppingCart,
+        user_id=user.id,
+        recipe_id=recipe.id
+    )
+
+
+def remove_recipe_from_shopping_cart(user: User, recipe_id: int) -> bool:
+    deleted, _ = ShoppingCart.objects.filter(
+        user_id=user.id,
+        recipe_id=recipe_id
+    ).delete()
+    return bool(deleted)
+
+
+def annotate_recipes_user_flags(queryset: QuerySet, user: User) -> QuerySet:
     if not user.is_authenticated:
-        return []
-    if is_shopping_cart:
-        return user.shopping_cart.all().values_list('recipe_id', flat=True)
-    return user.favorite_recipe.all().values_list('recipe_id', flat=True)
+        queryset = queryset.annotate(
+            is_favorited=Value(False),
+            is_in_shopping_cart=Value(False),
+        )
+    else:
+        queryset = queryset.annotate(
+            is_favorited=Exists(
+                FavoriteRecipe.objects.filter(
+                    user_id=user.id, recipe_id=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(
+                    user_id=user.id, recipe_id=OuterRef('pk'))
+            ),
+        )
+    return annotate_is_subscribed(
+        queryset, user, sub_field='author_id', name='is_author_subscribed')
 
 
 def get_recipes_ids_with_same_tag(tags: list[str]) -> list[int]:
     return RecipeTag.objects.filter(
-        tag_id__in=(
-            Tag.objects.filter(slug__in=tags).values_list('id', flat=True)
-        )
+        tag_id__in=tag_registry.get_ids(tags)
     ).values_list('recipe_id', flat=True)
 
 
-def get_subs_recipes(user: User) -> dict[int, QuerySet]:
-    subs_recipes = {}
-    for sub_id in get_subs_ids(user):
-        subs_recipes[sub_id] = get_user_recipes(sub_id)
+def get_authors_recipes_queryset(authors_ids: list[int],
+                                 limit: int) -> QuerySet:
+    return Recipe.objects.filter(
+        author_id__in=authors_ids
+    ).annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=F('author_id'),
+            order_by=(F('created_at').desc(), F('id').desc())
+        )
+    ).filter(
+        row_number__lte=limit
+    ).order_by(
+        'author_id', 'row_number'
+    ).only(
+        'id',
+        'author_id',
+        'name',
+        'image',
+        'has_image_derivatives',
+        'cooking_time',
+    )
+
+
+def group_authors_recipes(
+        authors_ids: list[int],
+        recipes: Iterable[Recipe]) -> dict[int, list[Recipe]]:
+    authors_recipes: dict[int, list[Recipe]] = {
+        author_id: [] for author_id in authors_ids
+    }
+    for recipe in recipes:
+        authors_recipes[recipe.author_id].append(recipe)
+
+    return authors_recipes
 
-    return subs_recipes
 
+def get_authors_recipes(authors_ids: list[int],
+                        limit: int) -> dict[int, list[Recipe]]:
+    return group_authors_recipes(
+        authors_ids, get_authors_recipes_queryset(authors_ids, limit))
 
-def get_user_shopping_cart(user: User) -> list[tuple[str, int, str]]:
+
+async def aget_authors_recipes(authors_ids: list[int],
+                               limit: int) -> dict[int, list[Recipe]]:
+    return group_authors_recipes(
+        authors_ids,
+        [recipe async for recipe in get_authors_recipes_queryset(
+            authors_ids, limit)]
+    )
+
+
+def get_user_shopping_cart(user: User) -> QuerySet:
     return (
-        RecipeIngredient.objects.select_related(
-            'ingredient'
-        ).filter(
-            recipe_id__in=get_user_fav_or_shopping_recipes_ids(user, True)
-        ).select_related(
-            'ingredient__measurement_unit'
+        RecipeIngredient.objects.filter(
+            recipe_id__in=ShoppingCart.objects.filter(
+                user_id=user.id
+            ).values('recipe_id')
+        ).values(
+            'ingredient_id',
+            'ingredient__measurement_unit_id',
+        ).annotate(
+            total_amount=Sum('amount')
+        ).order_by(
+            'ingredient__name'
         ).values_list(
-            'ingredient__name', 'amount', 'ingredient__measurement_unit__name'
+            'ingredient__name',
+            'total_amount',
+            'ingredient__measurement_unit__name',
         )
     )
 
 
-def get_tag_names() -> list[tuple[str, None]]:
-    return [(tag.slug, None) for tag in Tag.objects.all()]
-
-
-def get_favorited_count(recipe_id: int) -> int:
-    return get_object_or_404(
-        Recipe, id=recipe_id
-    ).favorite_recipe.all().count()
+async def aget_user_shopping_cart(user: User) -> AsyncIterator[tuple]:
+    # QuerySet.aiterator() в Django 4.2 выполняет values_list с аннотацией
+    # прямо в event loop, поэтому куски читаются через sync_to_async.
+    rows = get_user_shopping_cart(user).iterator(SHOPPING_CART_CHUNK_SIZE)
+    fetch_chunk = sync_to_async(
+        lambda: list(islice(rows, SHOPPING_CART_CHUNK_SIZE)))
+    while chunk := await fetch_chunk():
+        for row in chunk:
+            yield row
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from food.models import (
+    FavoriteRecipe,
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    Tag
+)
+from users.models import UserSubs
+from api.cache import (
+    INGREDIENTS_CATALOG,
+    RECIPES_CATALOG,
+    TAGS_CATALOG,
+    bump_version,
+    bump_version_on_commit,
+)
+from api.registries import tag_registry
+from api.search import ingredient_index
+from api.services import change_counter
+
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(sender, **kwargs) -> None:
+    tag_registry.invalidate()
+    bump_version_on_commit(TAGS_CATALOG)
+    bump_version_on_commit(RECIPES_CATALOG)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def refresh_ingredient(sender, instance, **kwargs) -> None:
+    def refresh() -> None:
+        version = bump_version(INGREDIENTS_CATALOG)
+        ingredient_index.refresh([instance.id], version - 1, version)
+
+    transaction.on_commit(refresh)
+    bump_version_on_commit(RECIPES_CATALOG)
+
+
+@receiver((post_save, post_delete), sender=MeasurementUnit)
+def invalidate_measurement_units(sender, **kwargs) -> None:
+    ingredient_index.invalidate()
+    bump_version_on_commit(INGREDIENTS_CATALOG)
+    bump_version_on_commit(RECIPES_CATALOG)
+
+
+@receiver(post_save, sender=Recipe)
+def count_created_recipe(sender, instance, created, **kwargs) -> None:
+    # Рецепты из сервисов и из админки считаются в одном месте.
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe(sender, instance, **kwargs) -> None:
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(pre_delete, sender=User)
+def uncount_deleted_user_relations(sender, instance, **kwargs) -> None:
+    # Избранное и подписки удаляются каскадом без сигналов, пары
+    # уникальны, поэтому каждый счётчик уменьшается ровно на один.
+    Recipe.objects.filter(
+        id__in=FavoriteRecipe.objects.filter(
+            user_id=instance.id).values('recipe_id')
+    ).update(favorites_count=F('favorites_count') - 1)
+    User.objects.filter(
+        id__in=UserSubs.objects.filter(
+            user_id=instance.id).values('sub_id')
+    ).update(subscribers_count=F('subscribers_count') - 1)
@@ -0,0 +1,95 @@
+import statistics
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.authtoken.models import Token
+
+from api.budgets import get_query_budget
+from food.models import Recipe, Tag
+
+
+User = get_user_model()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def get_busiest_user() -> User | None:
+    return User.objects.annotate(
+        subscriptions=Count('user_subscriptions', distinct=True),
+        cart=Count('shopping_cart', distinct=True),
+    ).order_by('-subscriptions', '-cart').first()
+
+
+def get_token_client(user: User) -> Client:
+    token, _ = Token.objects.get_or_create(user=user)
+    return Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+
+def setup_client_environment() -> None:
+    try:
+        setup_test_environment()
+    except RuntimeError:
+        pass
+
+
+def format_budget_url(url: str) -> str:
+    recipe = Recipe.objects.order_by('-id').first()
+    if recipe is None:
+        return url
+    return url.format(
+        recipe_id=recipe.id,
+        author_id=recipe.author_id,
+        tag_slug=Tag.objects.values_list('slug', flat=True).first(),
+    )
+
+
+def read_streaming_content(response: HttpResponse) -> bytes:
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    async def read() -> bytes:
+        return b''.join([
+            chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(read)()
+
+
+def measure_queries(client: Client,
+                    url: str,
+                    **extra) -> tuple[HttpResponse, int]:
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **extra)
+        if response.streaming:
+            read_streaming_content(response)
+    return response, len(context)
+
+
+def assert_query_budget(client: Client, url: str, **extra) -> HttpResponse:
+    response, queries = measure_queries(client, url, **extra)
+    route = response.resolver_match.view_name
+    budget = get_query_budget(route, response.request['REQUEST_METHOD'])
+    if budget is None:
+        raise QueryBudgetExceeded(f'Для {route} не задан бюджет запросов')
+    if queries > budget:
+        raise QueryBudgetExceeded(
+            f'{route} ({url}): {queries} запросов при бюджете {budget}')
+    return response
+
+
+def summarize_timings(timings: list[float]) -> dict[str, float]:
+    percentiles = statistics.quantiles(
+        timings, n=100, method='inclusive') if len(timings) > 1 else (
+        timings * 99)
+    return {
+        'p50_ms': round(percentiles[49], 2),
+        'p95_ms': round(percentiles[94], 2),
+        'p99_ms': round(percentiles[98], 2),
+        'mean_ms': round(statistics.fmean(timings), 2),
+    }
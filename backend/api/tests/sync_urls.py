@@ -0,0 +1,17 @@
+from django.test import override_settings
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from api.urls import router
+
+
+# Те же маршруты API с синхронными view, как при ASYNC_READ_VIEWS=False:
+# с ними тесты сравнивают ответы async-обработчиков.
+sync_router = DefaultRouter()
+for prefix, viewset, basename in router.registry:
+    sync_router.register(prefix, viewset, basename)
+
+with override_settings(ASYNC_READ_VIEWS=False):
+    urlpatterns = [
+        path('api/', include(sync_router.urls)),
+    ]
@@ -0,0 +1,132 @@
+from unittest import skipUnless
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import resolve
+from rest_framework.authtoken.models import Token
+
+from food.models import FavoriteRecipe, ShoppingCart
+from users.models import UserSubs
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+SYNC_URLCONF = 'api.tests.sync_urls'
+
+
+@skipUnless(settings.ASYNC_READ_VIEWS, 'async-обработчики отключены')
+class AsyncViewsParityTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        tags, ingredients = create_catalog(size=3)
+        cls.reader = create_user('reader')
+        cls.recipes = []
+        for username in ('alpha', 'beta', 'gamma'):
+            author = create_user(username)
+            UserSubs.objects.create(user=cls.reader, sub=author)
+            for number in range(2):
+                cls.recipes.append(create_recipe(
+                    author, tags[number:], ingredients[:number + 1]))
+        FavoriteRecipe.objects.create(user=cls.reader, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipes[1])
+        token, _ = Token.objects.get_or_create(user=cls.reader)
+        cls.auth = {'Authorization': f'Token {token.key}'}
+
+    async def aget(self, url: str, headers: dict):
+        return await AsyncClient().get(url, headers=headers)
+
+    def fetch(self, get, url: str, headers: dict) -> tuple[object, int]:
+        cache.clear()
+        with self.assertLogs('api.timing', 'INFO') as logs:
+            response = get(url, headers=headers)
+        return response, logs.records[-1].queries
+
+    def assert_same(self,
+                    url: str,
+                    headers: dict | None = None,
+                    status: int = 200) -> dict:
+        headers = headers or {}
+        path = urlsplit(url).path
+        self.assertTrue(iscoroutinefunction(resolve(path).func))
+        with self.settings(ROOT_URLCONF=SYNC_URLCONF):
+            self.assertFalse(iscoroutinefunction(resolve(path).func))
+            expected, expected_queries = self.fetch(
+                self.client.get, url, headers)
+        response, queries = self.fetch(
+            async_to_sync(self.aget), url, headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(queries, expected_queries)
+        return response.json()
+
+    def test_recipes(self) -> None:
+        urls = (
+            '/api/recipes/',
+            '/api/recipes/?limit=2&page=2',
+            '/api/recipes/?tags=tag-1&tags=tag-2',
+            '/api/recipes/?is_favorited=1',
+            '/api/recipes/?is_in_shopping_cart=1',
+            f'/api/recipes/?author={self.recipes[2].author_id}',
+            f'/api/recipes/{self.recipes[0].id}/',
+        )
+        for url in urls:
+            for headers in ({}, self.auth):
+                with self.subTest(url=url, auth=bool(headers)):
+                    self.assert_same(url, headers)
+        self.assert_same('/api/recipes/999999/', self.auth, status=404)
+
+    def test_recipes_cursor(self) -> None:
+        url = '/api/recipes/?limit=4&cursor='
+        pages = 0
+        while url:
+            url = self.assert_same(url, self.auth)['next']
+            pages += 1
+        self.assertEqual(pages, 2)
+
+    def test_catalogs(self) -> None:
+        urls = (
+            '/api/tags/',
+            '/api/ingredients/',
+            '/api/ingredients/?name=ингредиент',
+            '/api/ingredients/?name=1',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_same(url)
+        self.assert_same('/api/tags/999999/', status=404)
+
+    def test_subscriptions(self) -> None:
+        urls = (
+            '/api/users/subscriptions/',
+            '/api/users/subscriptions/?limit=1&page=2&recipes_limit=1',
+            '/api/users/subscriptions/?recipes_limit=0',
+            '/api/users/subscriptions/?recipes_limit=abc',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_same(url, self.auth)
+        self.assert_same('/api/users/subscriptions/', status=401)
+
+    def test_subscriptions_cursor(self) -> None:
+        url = '/api/users/subscriptions/?limit=2&recipes_limit=1&cursor='
+        pages = 0
+        while url:
+            url = self.assert_same(url, self.auth)['next']
+            pages += 1
+        self.assertEqual(pages, 2)
+
+    def test_invalid_token(self) -> None:
+        headers = {'Authorization': 'Token invalid'}
+        # Справочники не аутентифицируют запросы.
+        cases = (
+            ('/api/recipes/', 401),
+            ('/api/users/subscriptions/', 401),
+            ('/api/tags/', 200),
+        )
+        for url, status in cases:
+            with self.subTest(url=url):
+                self.assert_same(url, headers, status=status)
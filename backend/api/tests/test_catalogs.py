@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from food.models import Ingredient, MeasurementUnit, Tag
+from api.registries import TagRegistry
+from api.search import (
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    IngredientIndex
+)
+
+
+class SharedCatalogVersionTest(TestCase):
+    # Каждый экземпляр реестра или индекса изображает отдельный воркер:
+    # сигналы сбрасывают только объекты своего процесса, остальные
+    # узнают об изменении по версии каталога в общем кэше.
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.unit = MeasurementUnit.objects.create(name='г')
+
+    def test_tag_registry_sees_tag_created_by_other_worker(self) -> None:
+        first, second = TagRegistry(), TagRegistry()
+        self.assertEqual(first.get_ids(['breakfast']), [])
+        self.assertEqual(second.get_ids(['breakfast']), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(
+                name='Завтрак', color='#E26C2D', slug='breakfast')
+
+        self.assertEqual(first.get_ids(['breakfast']), [tag.id])
+        self.assertEqual(second.get_ids(['breakfast']), [tag.id])
+
+    def test_ingredient_index_sees_ingredient_created_by_other_worker(
+            self) -> None:
+        first, second = IngredientIndex(), IngredientIndex()
+        self.assertEqual(first.search('сыр'), [])
+        self.assertEqual(second.search('сыр'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient = Ingredient.objects.create(
+                name='Сыр', measurement_unit=self.unit)
+
+        expected = [{
+            'id': ingredient.id, 'name': 'Сыр', 'measurement_unit': 'г',
+        }]
+        self.assertEqual(first.search('сыр'), expected)
+        self.assertEqual(second.search('сыр'), expected)
+
+    def test_catalog_body_is_rendered_again_after_version_bump(self) -> None:
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.json(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(
+                name='Обед', color='#49B64E', slug='lunch')
+
+        response = self.client.get('/api/tags/')
+        self.assertEqual(
+            [tag['slug'] for tag in response.json()], ['lunch'])
+
+
+class IngredientSearchLimitTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        unit = MeasurementUnit.objects.create(name='г')
+        names = ['Морская соль', 'Сахар', 'Соль'] + [
+            f'Соль {number:03}' for number in range(SEARCH_MAX_LIMIT)
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit) for name in names)
+        self.prefix_count = SEARCH_MAX_LIMIT + 1
+        self.index = IngredientIndex()
+
+    def get_names(self, url: str) -> list[str]:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.json()]
+
+    def test_default_limit(self) -> None:
+        names = self.get_names('/api/ingredients/?name=соль')
+        self.assertEqual(len(names), SEARCH_DEFAULT_LIMIT)
+        self.assertEqual(names[0], 'Соль')
+
+    def test_limit_is_capped(self) -> None:
+        names = self.get_names('/api/ingredients/?name=соль&limit=100000')
+        self.assertEqual(len(names), SEARCH_MAX_LIMIT)
+
+    def test_substring_matches_fill_remaining_limit(self) -> None:
+        rows = self.index.search('соль', self.prefix_count + 5)
+        self.assertEqual(len(rows), self.prefix_count + 1)
+        self.assertEqual(rows[-1]['name'], 'Морская соль')
+
+        rows = self.index.search('соль', self.prefix_count)
+        self.assertNotIn('Морская соль', [row['name'] for row in rows])
+
+        rows = self.index.search('оль', 2)
+        self.assertEqual(
+            [row['name'] for row in rows], ['Морская соль', 'Соль'])
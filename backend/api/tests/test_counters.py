@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from food.models import FavoriteRecipe, Recipe
+from users.models import User, UserSubs
+from api.testing import get_token_client
+from api.tests.utils import (
+    TEST_MEDIA_ROOT,
+    create_catalog,
+    create_recipe,
+    create_user,
+    make_base64_image
+)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class CountersTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user()
+        self.author = create_user('author')
+        self.tags, self.ingredients = create_catalog(size=1)
+        self.recipe = create_recipe(self.author, self.tags, self.ingredients)
+        self.client = get_token_client(self.user)
+
+    def assert_counters(self,
+                        recipes: int,
+                        subscribers: int,
+                        favorites: int) -> None:
+        self.author.refresh_from_db()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, recipes)
+        self.assertEqual(self.author.subscribers_count, subscribers)
+        self.assertEqual(self.recipe.favorites_count, favorites)
+
+    def test_favorite_and_unfavorite(self) -> None:
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        self.client.post(url)
+        self.assert_counters(recipes=1, subscribers=0, favorites=1)
+        self.client.delete(url)
+        self.assert_counters(recipes=1, subscribers=0, favorites=0)
+
+    def test_subscribe_and_unsubscribe(self) -> None:
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.client.post(url)
+        self.assert_counters(recipes=1, subscribers=1, favorites=0)
+        self.client.delete(url)
+        self.assert_counters(recipes=1, subscribers=0, favorites=0)
+
+    def test_recipe_create_and_delete_through_api(self) -> None:
+        response = self.client.post(
+            '/api/recipes/',
+            {
+                'ingredients': [{'id': self.ingredients[0].id, 'amount': 1}],
+                'tags': [self.tags[0].id],
+                'image': make_base64_image(),
+                'name': 'Рецепт',
+                'text': 'Описание',
+                'cooking_time': 1,
+            },
+            content_type='application/json'
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 1)
+
+        self.client.delete(f'/api/recipes/{response.json()["id"]}/')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 0)
+
+    def test_recipe_create_and_delete_outside_services(self) -> None:
+        # Так рецепты сохраняет и удаляет админка.
+        recipe = Recipe.objects.create(
+            author=self.author,
+            name='Из админки',
+            image='recipes/images/admin.png',
+            text='Описание',
+            cooking_time=1,
+        )
+        self.assert_counters(recipes=2, subscribers=0, favorites=0)
+        recipe.delete()
+        self.assert_counters(recipes=1, subscribers=0, favorites=0)
+
+    def test_user_delete_cascades_counters(self) -> None:
+        self.client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        self.client.post(f'/api/users/{self.author.id}/subscribe/')
+        self.assert_counters(recipes=1, subscribers=1, favorites=1)
+
+        self.user.delete()
+        self.assertFalse(FavoriteRecipe.objects.exists())
+        self.assertFalse(UserSubs.objects.exists())
+        self.assert_counters(recipes=1, subscribers=0, favorites=0)
+
+    def test_recount_counters_repairs_drift(self) -> None:
+        FavoriteRecipe.objects.create(user=self.user, recipe=self.recipe)
+        UserSubs.objects.create(user=self.user, sub=self.author)
+        User.objects.filter(id=self.author.id).update(
+            recipes_count=7, subscribers_count=0)
+        Recipe.objects.filter(id=self.recipe.id).update(favorites_count=5)
+
+        call_command('recount_counters', stdout=StringIO())
+        self.assert_counters(recipes=1, subscribers=1, favorites=1)
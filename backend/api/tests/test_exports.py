@@ -0,0 +1,90 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from rest_framework.authtoken.models import Token
+
+from food.models import ShoppingCart
+from api.testing import get_token_client, read_streaming_content
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+@skipUnless(settings.ASYNC_READ_VIEWS, 'async-обработчики отключены')
+class ShoppingCartStreamingTest(TestCase):
+    url = '/api/recipes/download_shopping_cart/'
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = create_user()
+        tags, ingredients = create_catalog(size=4)
+        ShoppingCart.objects.create(
+            user=user, recipe=create_recipe(user, tags, ingredients))
+        token, _ = Token.objects.get_or_create(user=user)
+        self.headers = {'Authorization': f'Token {token.key}'}
+
+    async def download(self, accept: str) -> tuple[object, list[bytes]]:
+        response = await AsyncClient().get(
+            self.url, headers={**self.headers, 'Accept': accept})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        # Синхронный итератор под ASGI Django собирает в список целиком.
+        self.assertTrue(response.is_async)
+        return response, [
+            chunk async for chunk in response.streaming_content
+        ]
+
+    async def test_text_is_streamed_row_by_row(self) -> None:
+        response, chunks = await self.download('text/plain')
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(chunks[1].decode(), '- Ингредиент 0: 100 г\n')
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="shopping_cart.txt"')
+
+    async def test_csv_is_streamed_row_by_row(self) -> None:
+        _, chunks = await self.download('text/csv')
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(
+            chunks[0].decode(), 'Ингредиент,Количество,Единица измерения\r\n')
+
+    async def test_pdf_is_streamed(self) -> None:
+        response, chunks = await self.download('application/pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(chunks).startswith(b'%PDF'))
+
+
+class ShoppingCartNegotiationTest(TestCase):
+    url = '/api/recipes/download_shopping_cart/'
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = create_user()
+        tags, ingredients = create_catalog(size=2)
+        ShoppingCart.objects.create(
+            user=user, recipe=create_recipe(user, tags, ingredients))
+        self.authorized = get_token_client(user)
+
+    def test_anonymous_error_is_json(self) -> None:
+        response = self.client.get(self.url, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', response.json())
+
+    def test_json_accept_falls_back_to_text(self) -> None:
+        for accept in ('application/json', 'application/xml'):
+            with self.subTest(accept=accept):
+                response = self.authorized.get(
+                    self.url, HTTP_ACCEPT=accept)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response['Content-Type'], 'text/plain; charset=utf-8')
+                self.assertTrue(
+                    read_streaming_content(response).decode().startswith(
+                        'Список покупок'))
+
+    def test_format_param_wins_over_accept(self) -> None:
+        response = self.authorized.get(
+            f'{self.url}?format=csv', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
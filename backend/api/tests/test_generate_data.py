@@ -0,0 +1,49 @@
+import re
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from food.models import FavoriteRecipe, ShoppingCart, Tag
+from users.models import User, UserSubs
+from api.tests.utils import TEST_MEDIA_ROOT, create_catalog
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class GenerateDataTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_catalog(size=3)
+        Tag.objects.all().delete()
+
+    def generate(self, seed: int = 0) -> dict[str, int]:
+        stdout = StringIO()
+        call_command(
+            'generate_data', users=4, recipes=6, tags=2, chunk_size=3,
+            favorites_per_user=2, cart_per_user=2, subscriptions_per_user=2,
+            seed=seed, stdout=stdout)
+        created: dict[str, int] = {}
+        for model, count in re.findall(
+                r'^(\w+): создано (\d+)$', stdout.getvalue(), re.MULTILINE):
+            created[model] = created.get(model, 0) + int(count)
+        return created
+
+    def test_reported_counts_match_tables(self) -> None:
+        created = self.generate()
+        for model in (User, Tag, FavoriteRecipe, ShoppingCart, UserSubs):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    created.get(model.__name__, 0), model.objects.count())
+
+    def test_rerun_after_deletion_keeps_names_unique(self) -> None:
+        self.generate()
+        User.objects.get(username='user0').delete()
+        Tag.objects.get(slug='tag-0').delete()
+
+        created = self.generate(seed=1)
+        self.assertEqual(created['User'], 4)
+        self.assertEqual(created['Tag'], 1)
+        self.assertTrue(User.objects.filter(username='user7').exists())
+        self.assertTrue(Tag.objects.filter(slug='tag-2').exists())
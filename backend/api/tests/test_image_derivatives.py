@@ -0,0 +1,125 @@
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from food.models import Recipe
+from users.models import UserSubs
+from api.images import IMAGE_DERIVATIVES, get_derivative_name
+from api.services import make_recipe_image_derivatives
+from api.testing import get_token_client
+from api.tests.utils import (
+    TEST_MEDIA_ROOT,
+    create_catalog,
+    create_user,
+    make_base64_image
+)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ImageDerivativesTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = create_user('author')
+        self.reader = create_user('reader')
+        self.tags, self.ingredients = create_catalog(size=1)
+        self.author_client = get_token_client(self.author)
+        self.reader_client = get_token_client(self.reader)
+        UserSubs.objects.create(user=self.reader, sub=self.author)
+
+    def create_recipe(self) -> Recipe:
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.post(
+                '/api/recipes/',
+                {
+                    'ingredients': [
+                        {'id': self.ingredients[0].id, 'amount': 1}],
+                    'tags': [self.tags[0].id],
+                    'image': make_base64_image(),
+                    'name': 'Рецепт',
+                    'text': 'Описание',
+                    'cooking_time': 10,
+                },
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        return Recipe.objects.get(id=response.json()['id'])
+
+    def get_images(self, recipe: Recipe) -> dict[str, str]:
+        favorite = self.reader_client.post(
+            f'/api/recipes/{recipe.id}/favorite/')
+        subscriptions = self.reader_client.get('/api/users/subscriptions/')
+        return {
+            'list': self.client.get('/api/recipes/').json()[
+                'results'][0]['image'],
+            'detail': self.client.get(
+                f'/api/recipes/{recipe.id}/').json()['image'],
+            'favorite': favorite.json()['image'],
+            'subscription': subscriptions.json()[
+                'results'][0]['recipes'][0]['image'],
+        }
+
+    def assert_derivatives_exist(self, name: str, exist: bool) -> None:
+        for derivative in IMAGE_DERIVATIVES:
+            with self.subTest(name=name, derivative=derivative):
+                self.assertEqual(
+                    default_storage.exists(
+                        get_derivative_name(name, derivative)),
+                    exist
+                )
+
+    def test_payloads_use_derivatives(self) -> None:
+        recipe = self.create_recipe()
+        self.assertTrue(recipe.has_image_derivatives)
+        self.assert_derivatives_exist(recipe.image.name, True)
+        images = self.get_images(recipe)
+        self.assertTrue(images['list'].endswith(
+            get_derivative_name(recipe.image.name, 'card')))
+        self.assertTrue(images['detail'].endswith(recipe.image.name))
+        for payload in ('favorite', 'subscription'):
+            with self.subTest(payload=payload):
+                self.assertTrue(images[payload].endswith(
+                    get_derivative_name(recipe.image.name, 'thumbnail')))
+
+    @override_settings(IMAGE_DERIVATIVES_ON_REQUEST=False)
+    def test_payloads_fall_back_to_original(self) -> None:
+        recipe = self.create_recipe()
+        self.assertFalse(recipe.has_image_derivatives)
+        self.assert_derivatives_exist(recipe.image.name, False)
+        for payload, image in self.get_images(recipe).items():
+            with self.subTest(payload=payload):
+                self.assertTrue(image.endswith(recipe.image.name))
+
+        # Закэшированный список переходит на копию после её создания.
+        make_recipe_image_derivatives(recipe.id, recipe.image.name)
+        image = self.client.get('/api/recipes/').json()['results'][0]['image']
+        self.assertTrue(image.endswith(
+            get_derivative_name(recipe.image.name, 'card')))
+
+    def test_image_change_deletes_old_derivatives(self) -> None:
+        recipe = self.create_recipe()
+        old_name = recipe.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.patch(
+                f'/api/recipes/{recipe.id}/',
+                {'image': make_base64_image(size=(16, 16))},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        recipe.refresh_from_db()
+        self.assertNotEqual(recipe.image.name, old_name)
+        self.assertTrue(recipe.has_image_derivatives)
+        self.assert_derivatives_exist(old_name, False)
+        self.assert_derivatives_exist(recipe.image.name, True)
+
+    def test_patch_without_image_keeps_derivatives(self) -> None:
+        recipe = self.create_recipe()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.patch(
+                f'/api/recipes/{recipe.id}/',
+                {'name': 'Новое название'},
+                content_type='application/json'
+            )
+        recipe.refresh_from_db()
+        self.assertTrue(recipe.has_image_derivatives)
+        self.assert_derivatives_exist(recipe.image.name, True)
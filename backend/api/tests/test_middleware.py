@@ -0,0 +1,52 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from food.models import ShoppingCart
+from api.testing import read_streaming_content
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+@override_settings(SERVER_TIMING_HEADER=True)
+class StreamingTimingTest(TestCase):
+    url = '/api/recipes/download_shopping_cart/'
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = create_user()
+        tags, ingredients = create_catalog(size=2)
+        ShoppingCart.objects.create(
+            user=user, recipe=create_recipe(user, tags, ingredients))
+        token, _ = Token.objects.get_or_create(user=user)
+        self.headers = {'Authorization': f'Token {token.key}'}
+
+    def assert_logged_after_body(self, logs, response, content: bytes):
+        # Запись появляется только после чтения тела и учитывает
+        # запрос списка покупок, выполненный при отдаче.
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0]
+        self.assertEqual(record.route, 'recipe-download-shopping-cart')
+        self.assertEqual(record.queries, 2)
+        self.assertIn('Список покупок', content.decode())
+
+    def test_sync_stream_is_timed(self) -> None:
+        with self.assertLogs('api.timing', 'INFO') as logs:
+            response = self.client.get(self.url, headers=self.headers)
+            self.assertEqual(logs.records, [])
+            content = read_streaming_content(response)
+        self.assert_logged_after_body(logs, response, content)
+
+    @skipUnless(settings.ASYNC_READ_VIEWS, 'async-обработчики отключены')
+    async def test_async_stream_is_timed(self) -> None:
+        with self.assertLogs('api.timing', 'INFO') as logs:
+            response = await AsyncClient().get(self.url, headers=self.headers)
+            content = b''.join([chunk async for chunk in response])
+        self.assert_logged_after_body(logs, response, content)
+
+    def test_regular_response_keeps_header(self) -> None:
+        response = self.client.get('/api/tags/')
+        self.assertIn('Server-Timing', response)
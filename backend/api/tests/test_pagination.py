@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from food.models import Recipe
+from users.models import UserSubs
+from api.testing import get_token_client
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+def encode_cursor(cursor) -> str:
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+class KeysetPaginationMixin:
+    url: str
+
+    def walk(self, url: str, link: str) -> list[list[int]]:
+        pages = []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append([obj['id'] for obj in response.json()['results']])
+            url = response.json()[link]
+        return pages
+
+    def get_last_page_url(self) -> str:
+        url = f'{self.url}?limit=2&cursor='
+        while True:
+            next_url = self.client.get(url).json()['next']
+            if next_url is None:
+                return url
+            url = next_url
+
+    def test_forward_seek_matches_ordering(self) -> None:
+        pages = self.walk(f'{self.url}?limit=2&cursor=', 'next')
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.expected_ids)
+
+    def test_reverse_seek_returns_same_pages(self) -> None:
+        forward = self.walk(f'{self.url}?limit=2&cursor=', 'next')
+        backward = self.walk(self.get_last_page_url(), 'previous')
+        self.assertEqual(backward, forward[::-1])
+
+    def test_cursor_and_page_number_cover_same_objects(self) -> None:
+        # У ?page= нет уникального хвоста сортировки, поэтому при равных
+        # ключах сравниваются только сами объекты.
+        cursor_pages = self.walk(f'{self.url}?limit=2&cursor=', 'next')
+        number_pages = self.walk(f'{self.url}?limit=2', 'next')
+        self.assertEqual(
+            sorted(sum(cursor_pages, [])), sorted(sum(number_pages, [])))
+
+    def test_cursor_takes_precedence_over_page(self) -> None:
+        response = self.client.get(f'{self.url}?limit=2&page=2&cursor=')
+        self.assertNotIn('count', response.json())
+        self.assertEqual(
+            [obj['id'] for obj in response.json()['results']],
+            self.expected_ids[:2]
+        )
+
+    def test_invalid_cursor_is_not_found(self) -> None:
+        for cursor in (
+            'not-base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            encode_cursor({'v': [1], 'r': 0}),
+            encode_cursor({'v': ['not a value', 'x'], 'r': 0}),
+            encode_cursor({'r': 0}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    f'{self.url}?limit=2&cursor={cursor}')
+                self.assertEqual(response.status_code, 404)
+
+
+class RecipeKeysetPaginationTest(KeysetPaginationMixin, TestCase):
+    url = '/api/recipes/'
+
+    def setUp(self) -> None:
+        cache.clear()
+        author = create_user()
+        tags, ingredients = create_catalog(size=1)
+        recipes = [
+            create_recipe(author, tags, ingredients) for _ in range(5)
+        ]
+        # Три рецепта с одинаковым created_at: порядок решает -id.
+        now = timezone.now()
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes[:3]]
+        ).update(created_at=now)
+        Recipe.objects.filter(id=recipes[3].id).update(
+            created_at=now - timedelta(days=1))
+        Recipe.objects.filter(id=recipes[4].id).update(
+            created_at=now + timedelta(days=1))
+        self.expected_ids = [
+            recipes[4].id,
+            recipes[2].id,
+            recipes[1].id,
+            recipes[0].id,
+            recipes[3].id,
+        ]
+
+
+class SubscriptionKeysetPaginationTest(KeysetPaginationMixin, TestCase):
+    url = '/api/users/subscriptions/'
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = create_user()
+        authors = []
+        for number, first_name in enumerate(
+                ('Вера', 'Анна', 'Анна', 'Борис', 'Анна')):
+            author = create_user(f'author{number}')
+            author.first_name = first_name
+            author.save()
+            UserSubs.objects.create(user=user, sub=author)
+            authors.append(author)
+        self.client = get_token_client(user)
+        # Одинаковые first_name упорядочены по id.
+        self.expected_ids = [
+            authors[1].id,
+            authors[2].id,
+            authors[4].id,
+            authors[3].id,
+            authors[0].id,
+        ]
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.testing import assert_query_budget, get_token_client
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+class CatalogQueriesTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_catalog(size=5)
+
+    def test_ingredient_catalog_is_one_query(self) -> None:
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/ingredients/')
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(
+            response.json()[0].keys(), {'id', 'name', 'measurement_unit'})
+
+    def test_cached_catalog_body_skips_database(self) -> None:
+        etag = self.client.get('/api/ingredients/').headers['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/ingredients/')
+        self.assertEqual(len(response.json()), 5)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/ingredients/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_catalogs_fit_query_budget(self) -> None:
+        for url in ('/api/tags/', '/api/ingredients/'):
+            cache.clear()
+            with self.subTest(url=url):
+                assert_query_budget(self.client, url)
+
+
+class RecipeDetailQueriesTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user()
+        tags, ingredients = create_catalog(size=5)
+        self.recipe = create_recipe(self.user, tags, ingredients)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def test_query_count_does_not_depend_on_ingredients(self) -> None:
+        # Первый запрос загружает реестр тегов воркера.
+        self.client.get(self.url)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['ingredients']), 5)
+        self.assertEqual(len(response.json()['tags']), 5)
+
+    def test_recipe_detail_fits_query_budget(self) -> None:
+        assert_query_budget(self.client, self.url)
+        assert_query_budget(get_token_client(self.user), self.url)
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.http import http_date
+
+from food.models import Ingredient, Tag
+from api.testing import get_token_client
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+class RecipeETagTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = create_user('author')
+        self.reader = create_user('reader')
+        tags, ingredients = create_catalog()
+        self.recipe = create_recipe(self.author, tags, ingredients)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+        self.author_client = get_token_client(self.author)
+        self.reader_client = get_token_client(self.reader)
+
+    def get_etag(self) -> str:
+        response = self.reader_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assert_toggle_changes_etag(self, url: str) -> None:
+        before = self.get_etag()
+        self.assertEqual(self.reader_client.post(url).status_code, 200)
+        toggled = self.get_etag()
+        self.assertNotEqual(toggled, before)
+        response = self.reader_client.get(
+            self.url, HTTP_IF_NONE_MATCH=before)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.reader_client.delete(url).status_code, 204)
+        self.assertEqual(self.get_etag(), before)
+
+    def test_favorite_changes_etag(self) -> None:
+        self.assert_toggle_changes_etag(f'{self.url}favorite/')
+
+    def test_shopping_cart_changes_etag(self) -> None:
+        self.assert_toggle_changes_etag(f'{self.url}shopping_cart/')
+
+    def test_subscription_changes_etag(self) -> None:
+        self.assert_toggle_changes_etag(
+            f'/api/users/{self.author.id}/subscribe/')
+
+    def test_not_modified_until_patch(self) -> None:
+        etag = self.get_etag()
+        response = self.reader_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.patch(
+                self.url, {'name': 'Новое название'},
+                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        response = self.reader_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_catalog_bump_changes_etag(self) -> None:
+        etag = self.get_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.filter(slug='tag-0').get().save()
+        tags_etag = self.get_etag()
+        self.assertNotEqual(tags_etag, etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.first().save()
+        self.assertNotIn(self.get_etag(), (etag, tags_etag))
+
+    def test_last_modified_only_for_anonymous(self) -> None:
+        last_modified = http_date(self.recipe.updated_at.timestamp())
+        response = self.client.get(self.url)
+        self.assertEqual(response['Last-Modified'], last_modified)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.reader_client.get(self.url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        response = self.reader_client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
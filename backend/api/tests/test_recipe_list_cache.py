@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from api.cache import (
+    RECIPES_CATALOG,
+    get_recipes_list_cache_key,
+    get_version
+)
+from api.testing import get_token_client
+from api.tests.utils import (
+    TEST_MEDIA_ROOT,
+    create_catalog,
+    create_recipe,
+    create_user,
+    make_base64_image
+)
+
+
+@override_settings(
+    ALLOWED_HOSTS=['testserver', 'other'], MEDIA_ROOT=TEST_MEDIA_ROOT)
+class RecipeListCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user()
+        self.tags, self.ingredients = create_catalog()
+        self.recipes = [
+            create_recipe(self.user, self.tags, self.ingredients)
+            for _ in range(3)
+        ]
+
+    def get_names(self, url: str = '/api/recipes/?limit=6') -> list[str]:
+        return [recipe['name'] for recipe in self.client.get(url).json()[
+            'results']]
+
+    def test_links_are_not_shared_between_hosts(self) -> None:
+        response = self.client.get('/api/recipes/?limit=2', HTTP_HOST='other')
+        self.assertTrue(
+            response.json()['next'].startswith('http://other/'))
+
+        response = self.client.get('/api/recipes/?limit=2')
+        self.assertTrue(
+            response.json()['next'].startswith('http://testserver/'))
+
+    def test_repeated_single_param_uses_last_value(self) -> None:
+        third = self.client.get(
+            '/api/recipes/?limit=1&page=2&page=3').json()['results']
+        second = self.client.get(
+            '/api/recipes/?limit=1&page=3&page=2').json()['results']
+        self.assertNotEqual(third, second)
+        self.assertEqual(
+            second,
+            self.client.get('/api/recipes/?limit=1&page=2').json()['results']
+        )
+
+    def test_tags_order_shares_key(self) -> None:
+        factory = RequestFactory()
+        self.assertEqual(
+            get_recipes_list_cache_key(
+                factory.get('/api/recipes/?tags=tag-0&tags=tag-1')),
+            get_recipes_list_cache_key(
+                factory.get('/api/recipes/?tags=tag-1&tags=tag-0&tags=tag-0')),
+        )
+
+    def test_writes_bump_version_and_evict_page(self) -> None:
+        client = get_token_client(self.user)
+        self.assertEqual(len(self.get_names()), 3)
+
+        version = get_version(RECIPES_CATALOG)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                '/api/recipes/',
+                {
+                    'ingredients': [
+                        {'id': self.ingredients[0].id, 'amount': 1}],
+                    'tags': [self.tags[0].id],
+                    'image': make_base64_image(),
+                    'name': 'Новый',
+                    'text': 'Описание',
+                    'cooking_time': 1,
+                },
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertGreater(get_version(RECIPES_CATALOG), version)
+        self.assertEqual(self.get_names().count('Новый'), 1)
+
+        version = get_version(RECIPES_CATALOG)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(
+                f'/api/recipes/{self.recipes[0].id}/',
+                {'name': 'Изменённый'},
+                content_type='application/json'
+            )
+        self.assertGreater(get_version(RECIPES_CATALOG), version)
+        self.assertIn('Изменённый', self.get_names())
+
+        version = get_version(RECIPES_CATALOG)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertGreater(get_version(RECIPES_CATALOG), version)
+        self.assertNotIn('Изменённый', self.get_names())
+        self.assertEqual(len(self.get_names()), 3)
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.client import MULTIPART_CONTENT
+
+from food.models import RecipeIngredient, RecipeTag
+from api.testing import get_token_client
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+class RecipePartialUpdateTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user()
+        tags, ingredients = create_catalog()
+        self.recipe = create_recipe(self.user, tags, ingredients)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+        self.client = get_token_client(self.user)
+
+    def get_rows(self) -> tuple[set, set]:
+        return (
+            set(RecipeIngredient.objects.filter(
+                recipe=self.recipe).values_list('id', 'amount')),
+            set(RecipeTag.objects.filter(
+                recipe=self.recipe).values_list('id', 'tag_id')),
+        )
+
+    def assert_name_updated(self, response, rows: tuple[set, set]) -> None:
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['name'], 'Новое название')
+        self.assertEqual(len(response.json()['ingredients']), 3)
+        self.assertEqual(len(response.json()['tags']), 3)
+        self.assertEqual(self.get_rows(), rows)
+
+    def test_patch_only_name_keeps_ingredients_and_tags(self) -> None:
+        rows = self.get_rows()
+        response = self.client.patch(
+            self.url,
+            {'name': 'Новое название'},
+            content_type='application/json'
+        )
+        self.assert_name_updated(response, rows)
+
+    def test_multipart_patch_only_name(self) -> None:
+        rows = self.get_rows()
+        response = self.client.patch(
+            self.url,
+            self.client._encode_data(
+                {'name': 'Новое название'}, MULTIPART_CONTENT),
+            content_type=MULTIPART_CONTENT
+        )
+        self.assert_name_updated(response, rows)
@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from food.models import FavoriteRecipe, ShoppingCart
+from users.models import UserSubs
+from api.testing import get_token_client
+from api.tests.utils import create_catalog, create_recipe, create_user
+
+
+class UniqueRelationsTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user()
+        self.author = create_user('author')
+        tags, ingredients = create_catalog(size=1)
+        self.recipe = create_recipe(self.author, tags, ingredients)
+        self.client = get_token_client(self.user)
+
+    def assert_added_once(self, url: str, model, counter_owner,
+                          counter: str | None) -> None:
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(model.objects.filter(user=self.user).count(), 1)
+        if counter is not None:
+            counter_owner.refresh_from_db()
+            self.assertEqual(getattr(counter_owner, counter), 1)
+
+    def test_double_favorite(self) -> None:
+        self.assert_added_once(
+            f'/api/recipes/{self.recipe.id}/favorite/',
+            FavoriteRecipe, self.recipe, 'favorites_count')
+
+    def test_double_shopping_cart(self) -> None:
+        self.assert_added_once(
+            f'/api/recipes/{self.recipe.id}/shopping_cart/',
+            ShoppingCart, self.recipe, None)
+
+    def test_double_subscribe(self) -> None:
+        self.assert_added_once(
+            f'/api/users/{self.author.id}/subscribe/',
+            UserSubs, self.author, 'subscribers_count')
+
+    def test_remove_absent(self) -> None:
+        urls = (
+            f'/api/recipes/{self.recipe.id}/favorite/',
+            f'/api/recipes/{self.recipe.id}/shopping_cart/',
+            f'/api/users/{self.author.id}/subscribe/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.delete(url).status_code, 400)
+        self.recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+        self.assertEqual(self.author.subscribers_count, 0)
+
+    def test_unknown_object(self) -> None:
+        urls = (
+            '/api/recipes/999999/favorite/',
+            '/api/recipes/999999/shopping_cart/',
+            '/api/users/999999/subscribe/',
+        )
+        for url in urls:
+            for method in (self.client.post, self.client.delete):
+                with self.subTest(url=url, method=method.__name__):
+                    self.assertEqual(method(url).status_code, 404)
+
+
+class DeleteDuplicatesMigrationTest(TransactionTestCase):
+    migrate_from = [
+        ('food', '0007_recipe_updated_at'),
+        ('users', '0004_user_counters'),
+    ]
+    migrate_to = [
+        ('food', '0008_unique_join_tables'),
+        ('users', '0005_unique_user_subs'),
+    ]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self) -> None:
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_deleted_and_counters_recounted(self) -> None:
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('users', 'User')
+        user = User.objects.create(username='cook', email='cook@example.com')
+        author = User.objects.create(
+            username='author', email='author@example.com',
+            subscribers_count=5)
+        unit = apps.get_model('food', 'MeasurementUnit').objects.create(
+            name='г')
+        ingredient = apps.get_model('food', 'Ingredient').objects.create(
+            name='Соль', measurement_unit=unit)
+        tag = apps.get_model('food', 'Tag').objects.create(
+            name='Завтрак', color='#000000', slug='breakfast')
+        recipe = apps.get_model('food', 'Recipe').objects.create(
+            author=author, name='Рецепт', image='recipes/images/recipe.png',
+            text='Описание', cooking_time=10, favorites_count=5)
+        rows = {
+            ('food', 'FavoriteRecipe'): {'user': user, 'recipe': recipe},
+            ('food', 'ShoppingCart'): {'user': user, 'recipe': recipe},
+            ('food', 'RecipeTag'): {'recipe': recipe, 'tag': tag},
+            ('food', 'RecipeIngredient'): {
+                'recipe': recipe, 'ingredient': ingredient, 'amount': 1},
+            ('users', 'UserSubs'): {'user': user, 'sub': author},
+        }
+        kept_ids = {}
+        for (app_label, model_name), values in rows.items():
+            model = apps.get_model(app_label, model_name)
+            kept_ids[model_name] = model.objects.create(**values).id
+            model.objects.create(**values)
+
+        apps = self.migrate(self.migrate_to)
+        for (app_label, model_name), values in rows.items():
+            with self.subTest(model=model_name):
+                self.assertEqual(
+                    list(apps.get_model(app_label, model_name).objects
+                         .values_list('id', flat=True)),
+                    [kept_ids[model_name]]
+                )
+        self.assertEqual(
+            apps.get_model('food', 'Recipe').objects.get(
+                id=recipe.id).favorites_count, 1)
+        self.assertEqual(
+            apps.get_model('users', 'User').objects.get(
+                id=author.id).subscribers_count, 1)
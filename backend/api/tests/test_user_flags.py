@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from food.models import FavoriteRecipe, ShoppingCart
+from users.models import UserSubs
+from api.testing import get_token_client
+from api.tests.utils import (
+    TEST_MEDIA_ROOT,
+    create_catalog,
+    create_recipe,
+    create_user,
+    TEST_MEDIA_ROOT,
+    create_catalog,
+    create_recipe,
+    create_user,
+    make_base64_image
+)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class UserFlagsTest(TestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user()
+        self.author = create_user('author')
+        self.tags, self.ingredients = create_catalog()
+        self.client = get_token_client(self.user)
+
+    def test_created_recipe_is_serialized_with_flags(self) -> None:
+        response = self.client.post(
+            '/api/recipes/',
+            {
+                'ingredients': [
+                    {'id': self.ingredients[0].id, 'amount': 10}],
+                'tags': [self.tags[0].id],
+                'image': make_base64_image(),
+                'name': 'Новый рецепт',
+                'text': 'Описание',
+                'cooking_time': 5,
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIs(response.json()['is_favorited'], False)
+        self.assertIs(response.json()['is_in_shopping_cart'], False)
+        self.assertIs(response.json()['author']['is_subscribed'], False)
+
+    def test_recipe_flags_come_from_annotations(self) -> None:
+        recipe = create_recipe(self.author, self.tags, self.ingredients)
+        FavoriteRecipe.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        UserSubs.objects.create(user=self.user, sub=self.author)
+
+        for url in ('/api/recipes/', f'/api/recipes/{recipe.id}/'):
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                data = data['results'][0] if 'results' in data else data
+                self.assertIs(data['is_favorited'], True)
+                self.assertIs(data['is_in_shopping_cart'], True)
+                self.assertIs(data['author']['is_subscribed'], True)
+
+    def test_subscribe_response_is_subscribed(self) -> None:
+        response = self.client.post(
+            f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIs(response.json()['is_subscribed'], True)
+
+    def test_me_is_not_subscribed(self) -> None:
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.json()['is_subscribed'], False)
@@ -0,0 +1,77 @@
+import base64
+import io
+import tempfile
+
+from django.contrib.auth import get_user_model
+from PIL import Image
+
+from food.models import (
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Tag
+)
+
+
+User = get_user_model()
+
+TEST_MEDIA_ROOT: str = tempfile.mkdtemp(prefix='foodgram_test_media_')
+
+
+def create_user(username: str = 'cook') -> User:
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        first_name='Иван',
+        last_name='Петров',
+    )
+
+
+def create_catalog(size: int = 3) -> tuple[list[Tag], list[Ingredient]]:
+    units = [
+        MeasurementUnit.objects.create(name=name) for name in ('г', 'мл')
+    ]
+    tags = [
+        Tag.objects.create(
+            name=f'Тег {number}',
+            color=f'#00000{number}',
+            slug=f'tag-{number}'
+        )
+        for number in range(size)
+    ]
+    ingredients = [
+        Ingredient.objects.create(
+            name=f'Ингредиент {number}',
+            measurement_unit=units[number % len(units)]
+        )
+        for number in range(size)
+    ]
+    return tags, ingredients
+
+
+def create_recipe(author: User,
+                  tags: list[Tag],
+                  ingredients: list[Ingredient]) -> Recipe:
+    recipe = Recipe.objects.create(
+        author=author,
+        name='Рецепт',
+        image='recipes/images/recipe.png',
+        text='Описание',
+        cooking_time=10,
+    )
+    RecipeTag.objects.bulk_create(
+        RecipeTag(recipe=recipe, tag=tag) for tag in tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=100)
+        for ingredient in ingredients
+    )
+    return recipe
+
+
+def make_base64_image(size: tuple[int, int] = (8, 8)) -> str:
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()).decode()
@@ -0,0 +1,85 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from rest_framework import serializers
+
+
+class RequestTiming:
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.db: float = 0.0
+        self.serializer: float = 0.0
+        self.view: float = 0.0
+        self.total: float = 0.0
+        self.view_started: float | None = None
+        self.serializer_depth: int = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Соединение может быть общим для параллельных async-запросов.
+        if current_timing.get() is not self:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+    def as_header(self) -> str:
+        return ', '.join((
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer * 1000:.1f}',
+            f'view;dur={self.view * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ))
+
+    def as_log_fields(self) -> dict[str, int | float]:
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db * 1000, 1),
+            'serializer_ms': round(self.serializer * 1000, 1),
+            'view_ms': round(self.view * 1000, 1),
+            'total_ms': round(self.total * 1000, 1),
+        }
+
+
+current_timing: ContextVar[RequestTiming | None] = ContextVar(
+    'current_timing', default=None)
+
+
+@contextmanager
+def use_timing(timing: RequestTiming) -> Iterator[None]:
+    token = current_timing.set(timing)
+    try:
+        yield
+    finally:
+        current_timing.reset(token)
+
+
+@contextmanager
+def serializer_timer() -> Iterator[None]:
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+    timing.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serializer_depth -= 1
+        if not timing.serializer_depth:
+            timing.serializer += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
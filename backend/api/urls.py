@@ -13,5 +13,6 @@ router.register('recipes', views.RecipeViewSet)
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
     path('', include(router.urls))
 ]
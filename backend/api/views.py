@@ -1,12 +1,21 @@
-import csv
 from http import HTTPMethod
 
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.decorators import action
@@ -19,23 +28,55 @@ from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
 
 from api.services import (
+    annotate_is_subscribed,
+    annotate_recipes_user_flags,
     get_all_objects,
+    get_ingredients_rows,
     subscribe,
     unsubscribe,
     get_subscriptions,
-    get_user_fav_or_shopping_recipes_ids,
-    get_subs_ids,
-    get_subs_recipes,
+    aget_authors_recipes,
+    aget_recipes_ingredients,
+    SUBS_RECIPES_DEFAULT_LIMIT,
+    SUBS_RECIPES_MAX_LIMIT,
+    aget_user_shopping_cart,
     get_user_shopping_cart,
+    add_recipe_to_favorites,
+    remove_recipe_from_favorites,
+    add_recipe_to_shopping_cart,
+    remove_recipe_from_shopping_cart,
+    delete_recipe,
+)
+from api.cache import (
+    INGREDIENTS_CATALOG,
+    TAGS_CATALOG,
+    aget_recipe_etag,
+    aget_recipes_list_cache_key,
+    get_recipe_etag,
+    get_recipes_list_cache_key,
 )
 from api.exceptions import (
     AlreadySubscribedError,
     NotSubscribedError,
     SelfSubscriptionError
 )
-from api.filters import RecipeFilterSet, IngredientFilterSet
+from api.exporters import (
+    SHOPPING_CART_EXPORTERS,
+    ShoppingCartExporter,
+    ShoppingCartNegotiation
+)
+from api.filters import RecipeFilterSet
+from api.metrics import record_cache, render
+from api.mixins import AsyncReadMixin, CatalogListMixin
+from api.paginators import LimitOrCursorPagination
+from api.permissions import IsStaffOrInternalIP
+from api.search import (
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    ingredient_index
+)
 from users.serializers import SubscribeSerializer, UserRecipesSerializer
-from food.models import Tag, Ingredient, Recipe, FavoriteRecipe, ShoppingCart
+from food.models import Tag, Recipe
 from food.serializers import (
     TagSerializer,
     IngredientSerializer,
@@ -47,21 +88,41 @@ from food.serializers import (
 User = get_user_model()
 
 
-class UserViewSet(DjoserUserViewSet):
+class UserViewSet(AsyncReadMixin, DjoserUserViewSet):
+    async_actions = ('subscriptions',)
     ordering = ('username',)
+    # Подписки выдаются в порядке Meta.ordering модели User (first_name),
+    # id делает ключ уникальным для одинаковых имён.
+    cursor_ordering = ('first_name', 'id')
+
+    def get_queryset(self):
+        return annotate_is_subscribed(
+            super().get_queryset(), self.request.user)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({
             'request': self.request,
-            'subs_ids': get_subs_ids(self.request.user),
-            'subs_recipes': get_subs_recipes(self.request.user)
+            'recipes_limit': SUBS_RECIPES_DEFAULT_LIMIT,
         })
         recipes_limit: str = self.request.query_params.get('recipes_limit')
         if recipes_limit and recipes_limit.isdigit():
-            context['recipes_limit'] = int(recipes_limit)
+            context['recipes_limit'] = min(
+                int(recipes_limit), SUBS_RECIPES_MAX_LIMIT)
+        return context
+
+    async def aget_serializer_context(self, users: list[User]) -> dict:
+        context = self.get_serializer_context()
+        context['authors_recipes'] = await aget_authors_recipes(
+            [user.id for user in users], context['recipes_limit'])
         return context
 
+    def get_instance(self):
+        user = super().get_instance()
+        # На себя подписаться нельзя, флаг известен без запроса.
+        user.is_subscribed = False
+        return user
+
     @action(
         methods=['get'],
         detail=False,
@@ -81,6 +142,7 @@ class UserViewSet(DjoserUserViewSet):
             try:
                 user = get_object_or_404(User, id=id)
                 subscribe(request.user, user)
+                user.is_subscribed = True
             except AlreadySubscribedError:
                 return Response(
                     {'errors': 'Вы уже подписаны на этого пользователя'},
@@ -114,9 +176,11 @@ class UserViewSet(DjoserUserViewSet):
         detail=False,
         permission_classes=[IsAuthenticated],
         serializer_class=SubscribeSerializer,
+        pagination_class=LimitOrCursorPagination,
     )
     def subscriptions(self, request: Request, pk: int = None):
-        queryset = get_subscriptions(request.user)
+        queryset = annotate_is_subscribed(
+            get_subscriptions(request.user), request.user)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.serializer_class(
@@ -133,38 +197,93 @@ class UserViewSet(DjoserUserViewSet):
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    async def asubscriptions(self, request: Request, pk: int = None):
+        queryset = annotate_is_subscribed(
+            get_subscriptions(request.user), request.user)
+        page = await self.apaginate_queryset(queryset)
+        users = page if page is not None else [
+            user async for user in queryset
+        ]
+        serializer = self.serializer_class(
+            users,
+            many=True,
+            context=await self.aget_serializer_context(users)
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class TagViewSet(
+    CatalogListMixin,
+    AsyncReadMixin,
     RetrieveModelMixin,
     ListModelMixin,
     GenericViewSet
 ):
     queryset = get_all_objects(Tag)
+    async_actions = ('list', 'retrieve')
+    catalog = TAGS_CATALOG
     serializer_class = TagSerializer
     ordering = ('name',)
     pagination_class = None
 
 
 class IngredientViewSet(
+    CatalogListMixin,
+    AsyncReadMixin,
     RetrieveModelMixin,
     ListModelMixin,
     GenericViewSet
 ):
-    queryset = get_all_objects(Ingredient)
+    queryset = get_ingredients_rows()
+    async_actions = ('list', 'retrieve')
+    catalog = INGREDIENTS_CATALOG
     serializer_class = IngredientSerializer
     ordering = ('name',)
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilterSet
+    # Поиск по name обслуживает только индекс ingredient_index.
+    filter_backends = ()
     pagination_class = None
 
+    def get_search_limit(self) -> int:
+        limit: str = self.request.query_params.get('limit')
+        if limit and limit.isdigit():
+            return min(int(limit), SEARCH_MAX_LIMIT)
+        return SEARCH_DEFAULT_LIMIT
 
-class RecipeViewSet(ModelViewSet):
-    queryset = get_all_objects(Recipe)
+    def list(self, request, *args, **kwargs):
+        name: str = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+
+        return Response(
+            ingredient_index.search(name, self.get_search_limit()))
+
+    async def alist(self, request, *args, **kwargs):
+        name: str = request.query_params.get('name')
+        if name is None:
+            return await super().alist(request, *args, **kwargs)
+
+        return Response(
+            await ingredient_index.asearch(name, self.get_search_limit()))
+
+
+class RecipeViewSet(AsyncReadMixin, ModelViewSet):
+    async_actions = ('list', 'retrieve', 'download_shopping_cart')
+    queryset = get_all_objects(Recipe).select_related(
+        'author'
+    ).prefetch_related('tags')
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    pagination_class = LimitOrCursorPagination
     ordering = ('created_at',)
+    cursor_ordering = ('-created_at', '-id')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilterSet
 
+    def get_queryset(self):
+        return annotate_recipes_user_flags(
+            super().get_queryset(), self.request.user)
+
     def get_serializer_class(self):
         if self.request.method == HTTPMethod.GET:
             serializer_class = RecipeGETSerializer
@@ -177,18 +296,111 @@ class RecipeViewSet(ModelViewSet):
         context = super().get_serializer_context()
         context.update({
             'request': self.request,
-            'subs_ids': get_subs_ids(self.request.user),
-            'favorite_recipes_ids': get_user_fav_or_shopping_recipes_ids(
-                self.request.user),
-            'shopping_cart': get_user_fav_or_shopping_recipes_ids(
-                self.request.user, True),
         })
         return context
 
+    async def aget_serializer_context(self, recipes: list[Recipe]) -> dict:
+        context = self.get_serializer_context()
+        context['recipes_ingredients'] = await aget_recipes_ingredients(
+            [recipe.id for recipe in recipes])
+        return context
+
+    def handle_exception(self, exc):
+        if self.action == 'download_shopping_cart':
+            # Ошибки выгрузки отдаются JSON, а не в формате файла.
+            self.request.accepted_renderer = JSONRenderer()
+            self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
+    def get_last_modified(self, instance: Recipe) -> int | None:
+        if self.request.user.is_authenticated:
+            return None
+        return int(instance.updated_at.timestamp())
+
+    def get_not_modified_response(self,
+                                  etag: str,
+                                  last_modified: int | None):
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified)
+        if {'If-None-Match', 'If-Modified-Since'} & set(
+                self.request.headers):
+            record_cache('recipe_conditional', response is not None)
+        return response
+
+    def patch_conditional_headers(self,
+                                  response,
+                                  etag: str,
+                                  last_modified: int | None):
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = get_recipe_etag(instance)
+        last_modified = self.get_last_modified(instance)
+        response = self.get_not_modified_response(etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return self.patch_conditional_headers(response, etag, last_modified)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        etag = await aget_recipe_etag(instance)
+        last_modified = self.get_last_modified(instance)
+        response = self.get_not_modified_response(etag, last_modified)
+        if response is None:
+            serializer = self.get_serializer(
+                instance,
+                context=await self.aget_serializer_context([instance])
+            )
+            response = Response(serializer.data)
+        return self.patch_conditional_headers(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        cache_key = get_recipes_list_cache_key(request)
+        if cache_key is None:
+            return super().list(request, *args, **kwargs)
+
+        data = cache.get(cache_key)
+        record_cache('recipes_list', data is not None)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(
+            cache_key, response.data, settings.RECIPES_LIST_CACHE_TIMEOUT)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return await super().alist(request, *args, **kwargs)
+
+        cache_key = await aget_recipes_list_cache_key(request)
+        if cache_key is None:
+            return await super().alist(request, *args, **kwargs)
+
+        data = await cache.aget(cache_key)
+        record_cache('recipes_list', data is not None)
+        if data is not None:
+            return Response(data)
+
+        response = await super().alist(request, *args, **kwargs)
+        await cache.aset(
+            cache_key, response.data, settings.RECIPES_LIST_CACHE_TIMEOUT)
+        return response
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        instance = self.perform_create(serializer)
+        instance = self.get_queryset().get(
+            pk=self.perform_create(serializer).pk)
         serializer = RecipeGETSerializer(
             instance,
             context=self.get_serializer_context()
@@ -208,6 +420,9 @@ class RecipeViewSet(ModelViewSet):
             )
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        delete_recipe(instance)
+
     def update(self, request, *args, **kwargs):
         if request.method == HTTPMethod.PUT:
             raise MethodNotAllowed(request.method)
@@ -223,6 +438,8 @@ class RecipeViewSet(ModelViewSet):
             instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
+        if getattr(instance, '_prefetched_objects_cache', None):
+            instance._prefetched_objects_cache = {}
         serializer = RecipeGETSerializer(
             instance,
             context=self.get_serializer_context()
@@ -242,9 +459,7 @@ class RecipeViewSet(ModelViewSet):
     def favorite(self, request, pk=None):
         if request.method == HTTPMethod.POST:
             recipe = get_object_or_404(Recipe, id=pk)
-            _, is_created = FavoriteRecipe.objects.get_or_create(
-                user=request.user,
-                recipe=recipe)
+            is_created = add_recipe_to_favorites(request.user, recipe)
             serializer = self.serializer_class(
                 recipe,
                 context=self.get_serializer_context()
@@ -258,10 +473,12 @@ class RecipeViewSet(ModelViewSet):
 
             return Response(serializer.data, status=status.HTTP_200_OK)
         if request.method == HTTPMethod.DELETE:
-            get_object_or_404(
-                FavoriteRecipe,
-                user_id=request.user.id,
-                recipe_id=pk).delete()
+            if not remove_recipe_from_favorites(request.user, pk):
+                get_object_or_404(Recipe, id=pk)
+                return Response(
+                    {'details': 'Рецепта нет в избранном'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response('', status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -273,9 +490,7 @@ class RecipeViewSet(ModelViewSet):
     def shopping_cart(self, request, pk=None):
         if request.method == HTTPMethod.POST:
             recipe = get_object_or_404(Recipe, id=pk)
-            _, is_created = ShoppingCart.objects.get_or_create(
-                user=request.user,
-                recipe=recipe)
+            is_created = add_recipe_to_shopping_cart(request.user, recipe)
             serializer = self.serializer_class(
                 recipe,
                 context=self.get_serializer_context()
@@ -289,45 +504,54 @@ class RecipeViewSet(ModelViewSet):
 
             return Response(serializer.data, status=status.HTTP_200_OK)
         if request.method == HTTPMethod.DELETE:
-            get_object_or_404(
-                ShoppingCart,
-                user_id=request.user.id,
-                recipe_id=pk).delete()
+            if not remove_recipe_from_shopping_cart(request.user, pk):
+                get_object_or_404(Recipe, id=pk)
+                return Response(
+                    {'details': 'Рецепта нет в списке покупок'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response('', status=status.HTTP_204_NO_CONTENT)
 
     @action(
         methods=('get',),
         detail=False,
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=SHOPPING_CART_EXPORTERS,
+        content_negotiation_class=ShoppingCartNegotiation,
     )
     def download_shopping_cart(self, request, pk=None):
-        response = HttpResponse(
-            content_type='text/plain',
+        exporter = request.accepted_renderer
+        return self.get_shopping_cart_response(
+            exporter,
+            exporter.stream(get_user_shopping_cart(request.user).iterator())
+        )
+
+    async def adownload_shopping_cart(self, request, pk=None):
+        # Под ASGI синхронный итератор Django собрал бы в список целиком.
+        exporter = request.accepted_renderer
+        return self.get_shopping_cart_response(
+            exporter,
+            exporter.astream(aget_user_shopping_cart(request.user))
+        )
+
+    def get_shopping_cart_response(self,
+                                   exporter: ShoppingCartExporter,
+                                   content) -> StreamingHttpResponse:
+        return StreamingHttpResponse(
+            content,
+            content_type=exporter.get_content_type(),
             headers={
                 'Content-Disposition': (
-                    'attachment; filename="shopping_cart.txt"')
+                    f'attachment; filename="{exporter.get_filename()}"')
             },
         )
 
-        writer = csv.writer(response)
-        writer.writerow(('Список покупок',))
-        writer.writerow('')
-
-        amounts = {}
-        measurement_units = {}
-        shopping_cart = get_user_shopping_cart(self.request.user)
 
-        for ingredient, amount, measurement_unit in shopping_cart:
-            measurement_units[ingredient] = measurement_unit
+class MetricsView(APIView):
+    permission_classes = (IsStaffOrInternalIP,)
 
-            if amounts.get(ingredient):
-                amounts[ingredient] += amount
-            else:
-                amounts[ingredient] = amount
-
-        for ing in amounts.keys():
-            writer.writerow(
-                [f'- {ing}: {amounts[ing]} {measurement_units[ing]}']
-            )
-
-        return response
+    def get(self, request: Request) -> HttpResponse:
+        return HttpResponse(
+            render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
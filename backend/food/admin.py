@@ -2,7 +2,6 @@ from django.contrib import admin
 from django.utils.safestring import mark_safe
 
 from food.models import Tag, Ingredient, MeasurementUnit, Recipe
-from api.services import get_favorited_count
 
 
 INGREDIENTS_MIN_NUM: int = 1
@@ -79,4 +78,4 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @admin.display(description='Количество добавлений рецепта в избранное')
     def is_favorited_count(self, instance):
-        return mark_safe(f'<dev>{get_favorited_count(instance.id)}</dev>')
+        return mark_safe(f'<dev>{instance.favorites_count}</dev>')
@@ -1,59 +1,174 @@
-from typing import Any
+import csv
 import json
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
 
 from django.core.management.base import BaseCommand, CommandParser
-from django.db.utils import IntegrityError
+from django.db import transaction
 
+from api.cache import INGREDIENTS_CATALOG, RECIPES_CATALOG, bump_version
 from food.models import Ingredient, MeasurementUnit
 from foodgram_backend.settings import BASE_DIR
 
 
+IngredientRow = tuple[str, str]
+
+READ_SIZE: int = 64 * 1024
+
+
+def iter_json_array(file: TextIO) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    while True:
+        chunk = file.read(READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started:
+                if position == len(buffer):
+                    break
+                if buffer[position] != '[':
+                    raise ValueError('Ожидается JSON-массив')
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            yield item
+        if not chunk:
+            return
+
+
+def iter_ndjson(file: TextIO) -> Iterator[Any]:
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_rows(items: Iterable[Any]) -> Iterator[IngredientRow | None]:
+    for item in items:
+        try:
+            yield item['name'].strip(), item['measurement_unit'].strip()
+        except (KeyError, TypeError, AttributeError):
+            yield None
+
+
+def iter_csv_rows(file: TextIO) -> Iterator[IngredientRow | None]:
+    for row in csv.reader(file):
+        if len(row) != 2:
+            yield None
+            continue
+        yield row[0].strip(), row[1].strip()
+
+
 class Command(BaseCommand):
-    help: str = '''Команда для добавления ингредиентов из json файлов.
+    help: str = '''Команда для добавления ингредиентов из файлов json,
+    ndjson или csv (без заголовка, в формате "название,единица").
     Загрузите файл в папку read_json и используйте команду в формате:
-    python manage.py add_ingredients <your_file.json>'''
+    python manage.py add_ingredients <your_file> [--format json|ndjson|csv]
+    [--chunk-size N]'''
     folder_path: str = BASE_DIR / 'read_json'
+    formats: tuple[str, ...] = ('json', 'ndjson', 'csv')
 
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument('file_name', type=str)
+        parser.add_argument('--format', choices=self.formats)
+        parser.add_argument('--chunk-size', type=int, default=5000)
 
     def handle(self, *args: Any, **options: Any) -> str | None:
+        path = Path(self.folder_path) / options.get('file_name')
+        file_format = options.get('format') or path.suffix.lstrip('.')
+        if file_format == 'jsonl':
+            file_format = 'ndjson'
+        if file_format not in self.formats:
+            return f'Неизвестный формат файла: {file_format}'
+
         try:
-            file = open(
-                self.folder_path / options.get('file_name'),
-                encoding='utf'
-            )
+            file = open(path, encoding='utf', newline='')
         except FileNotFoundError:
             return 'Файл не найден'
 
-        reader = json.load(file)
+        self.units: dict[str, int] = dict(
+            MeasurementUnit.objects.values_list('name', 'id'))
+        self.processed = self.errors = 0
+        self.started = time.monotonic()
+        initial_count = Ingredient.objects.count()
 
-        for row in reader:
-            try:
-                ingredient_name = row['name']
-                measurement_unit_name = row['measurement_unit']
-            except KeyError:
-                self.stdout.write('Ошибка в данных.')
-                continue
+        with file:
+            if file_format == 'csv':
+                rows = iter_csv_rows(file)
+            elif file_format == 'ndjson':
+                rows = iter_json_rows(iter_ndjson(file))
+            else:
+                rows = iter_json_rows(iter_json_array(file))
+
+            while chunk := list(islice(rows, options.get('chunk_size'))):
+                self.save_chunk(chunk)
+                self.report()
+
+        added = Ingredient.objects.count() - initial_count
+        if added:
+            bump_version(INGREDIENTS_CATALOG)
+            bump_version(RECIPES_CATALOG)
+        self.stdout.write(
+            f'Готово: обработано {self.processed}, добавлено {added}, '
+            f'ошибок в данных {self.errors}.'
+        )
+
+    def save_chunk(self, chunk: list[IngredientRow | None]) -> None:
+        rows = [row for row in chunk if self.is_valid(row)]
+        self.processed += len(chunk)
+        self.errors += len(chunk) - len(rows)
 
-            measurement_unit, is_created = (
-                MeasurementUnit.objects.get_or_create(
-                    name=measurement_unit_name
+        with transaction.atomic():
+            new_units = {unit for _, unit in rows} - set(self.units)
+            if new_units:
+                MeasurementUnit.objects.bulk_create(
+                    [MeasurementUnit(name=unit) for unit in new_units],
+                    ignore_conflicts=True
                 )
-            )
-            if is_created:
-                self.stdout.write(
-                    f'Единица - {measurement_unit} добавлена.')
-            else:
-                self.stdout.write(
-                    f'Единица - {measurement_unit} уже существует.')
-            try:
-                ingredient, is_created = Ingredient.objects.get_or_create(
-                    name=ingredient_name, measurement_unit=measurement_unit
+                self.units.update(
+                    MeasurementUnit.objects.filter(
+                        name__in=new_units
+                    ).values_list('name', 'id')
                 )
-            except IntegrityError as err:
-                self.stdout.write(f'Ошибка в данных: {err}')
-            if is_created:
-                self.stdout.write(f'Ингредиент - {ingredient} добавлен.')
-            else:
-                self.stdout.write(f'Ингредиент - {ingredient} уже существует.')
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(
+                        name=name,
+                        measurement_unit_id=self.units[unit]
+                    )
+                    for name, unit in rows
+                ],
+                ignore_conflicts=True
+            )
+
+    def is_valid(self, row: IngredientRow | None) -> bool:
+        if row is None:
+            return False
+        name, unit = row
+        return (
+            0 < len(name) <= Ingredient._meta.get_field('name').max_length
+            and 0 < len(unit) <= (
+                MeasurementUnit._meta.get_field('name').max_length)
+        )
+
+    def report(self) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        self.stdout.write(
+            f'Обработано {self.processed} строк '
+            f'({self.processed / elapsed:.0f} строк/с), '
+            f'ошибок {self.errors}.'
+        )
@@ -0,0 +1,63 @@
+from typing import Any
+
+from django.core.cache import cache
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser
+)
+from django.test import Client
+
+from api.budgets import BUDGET_REQUESTS
+from api.testing import (
+    QueryBudgetExceeded,
+    assert_query_budget,
+    format_budget_url,
+    get_busiest_user,
+    get_token_client,
+    setup_client_environment
+)
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для проверки бюджетов SQL-запросов основных
+    эндпоинтов из api/budgets.py. Завершается ошибкой, если бюджет
+    превышен. Используйте команду в формате:
+    python manage.py check_query_budgets [--repeat N]'''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--repeat', type=int, default=2)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        user = get_busiest_user()
+        if user is None:
+            raise CommandError(
+                'Нет данных, сначала выполните python manage.py generate_data')
+
+        setup_client_environment()
+        cache.clear()
+        anonymous = Client()
+        authorized = get_token_client(user)
+
+        failures = []
+        for url, is_authorized in BUDGET_REQUESTS:
+            url = format_budget_url(url)
+            client = authorized if is_authorized else anonymous
+            for _ in range(options.get('repeat')):
+                try:
+                    response = assert_query_budget(client, url)
+                except QueryBudgetExceeded as error:
+                    failures.append(str(error))
+                    self.stderr.write(str(error))
+                    break
+                if response.status_code != 200:
+                    failures.append(f'{url}: статус {response.status_code}')
+                    self.stderr.write(failures[-1])
+                    break
+            else:
+                self.stdout.write(
+                    f'{url} ({"токен" if is_authorized else "аноним"}): ок')
+
+        if failures:
+            raise CommandError(f'Превышено бюджетов: {len(failures)}')
+        self.stdout.write('Все бюджеты запросов соблюдены.')
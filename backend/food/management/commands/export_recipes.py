@@ -0,0 +1,87 @@
+import json
+import sys
+from collections import defaultdict
+from typing import Any, TextIO
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from food.models import Recipe, RecipeIngredient, RecipeTag
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для выгрузки рецептов в формате NDJSON: одна
+    строка на рецепт с ингредиентами, тегами и путём к картинке.
+    Используйте команду в формате:
+    python manage.py export_recipes <file.ndjson | -> [--chunk-size N]'''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('file_name', type=str)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        file_name: str = options.get('file_name')
+        self.chunk_size: int = options.get('chunk_size')
+        if file_name == '-':
+            self.export(sys.stdout)
+            return None
+        with open(file_name, 'w', encoding='utf') as file:
+            exported = self.export(file)
+        self.stdout.write(f'Выгружено рецептов: {exported}.')
+
+    def export(self, file: TextIO) -> int:
+        exported = 0
+        last_id = 0
+        while True:
+            recipes = list(
+                Recipe.objects.filter(
+                    id__gt=last_id
+                ).order_by('id').values(
+                    'id',
+                    'author__email',
+                    'name',
+                    'text',
+                    'cooking_time',
+                    'image',
+                    'created_at',
+                )[:self.chunk_size]
+            )
+            if not recipes:
+                return exported
+            last_id = recipes[-1]['id']
+            recipes_ids = [recipe['id'] for recipe in recipes]
+
+            ingredients = defaultdict(list)
+            for recipe_id, name, unit, amount in (
+                RecipeIngredient.objects.filter(
+                    recipe_id__in=recipes_ids
+                ).order_by('id').values_list(
+                    'recipe_id',
+                    'ingredient__name',
+                    'ingredient__measurement_unit__name',
+                    'amount',
+                )
+            ):
+                ingredients[recipe_id].append({
+                    'name': name,
+                    'measurement_unit': unit,
+                    'amount': amount,
+                })
+
+            tags = defaultdict(list)
+            for recipe_id, slug in RecipeTag.objects.filter(
+                recipe_id__in=recipes_ids
+            ).order_by('id').values_list('recipe_id', 'tag__slug'):
+                tags[recipe_id].append(slug)
+
+            for recipe in recipes:
+                file.write(json.dumps({
+                    'author': recipe['author__email'],
+                    'name': recipe['name'],
+                    'text': recipe['text'],
+                    'cooking_time': recipe['cooking_time'],
+                    'image': recipe['image'],
+                    'created_at': recipe['created_at'].isoformat(),
+                    'tags': tags[recipe['id']],
+                    'ingredients': ingredients[recipe['id']],
+                }, ensure_ascii=False) + '\n')
+            exported += len(recipes)
@@ -0,0 +1,247 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+from typing import Any, Sequence
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+from PIL import Image
+
+from api.cache import RECIPES_CATALOG, TAGS_CATALOG, bump_version
+from api.images import make_derivatives
+from food.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    ShoppingCart,
+    Tag,
+)
+from users.models import UserSubs
+
+
+User = get_user_model()
+
+
+class ZipfSampler:
+    def __init__(self,
+                 items: Sequence[int],
+                 exponent: float,
+                 rng: random.Random) -> None:
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.items) + 1)
+        ))
+        self.rng = rng
+
+    def sample(self, count: int, exclude: int | None = None) -> set[int]:
+        available = len(self.items) - (exclude is not None)
+        count = min(count, available // 2 or available)
+        chosen: set[int] = set()
+        while len(chosen) < count:
+            for item in self.rng.choices(
+                    self.items, cum_weights=self.cum_weights,
+                    k=count - len(chosen)):
+                if item != exclude:
+                    chosen.add(item)
+        return chosen
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для генерации синтетических данных: пользователи,
+    рецепты с распределением ингредиентов и тегов по закону Ципфа,
+    избранное, списки покупок и подписки со степенным распределением.
+    Ингредиенты должны быть загружены заранее (add_ingredients).
+    Используйте команду в формате:
+    python manage.py generate_data [--users N] [--recipes N] [--seed N]'''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=12)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--zipf-exponent', type=float, default=1.1)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        self.options = options
+        self.chunk_size: int = options.get('chunk_size')
+        self.rng = random.Random(options.get('seed'))
+        ingredients_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredients_ids:
+            return ('Ингредиенты не найдены, сначала выполните '
+                    'python manage.py add_ingredients ingredients.json')
+
+        tags_ids = self.create_tags(options.get('tags'))
+        users_ids = self.create_users(options.get('users'))
+        recipes_ids = self.create_recipes(
+            options.get('recipes'), users_ids, ingredients_ids, tags_ids)
+        self.create_relations(users_ids, recipes_ids)
+
+        call_command('recount_counters', chunk_size=self.chunk_size,
+                     stdout=self.stdout)
+        bump_version(TAGS_CATALOG)
+        bump_version(RECIPES_CATALOG)
+
+    def sampler(self, items: Sequence[int]) -> ZipfSampler:
+        return ZipfSampler(items, self.options.get('zipf_exponent'), self.rng)
+
+    def bulk_create(self, model, objs: list) -> list:
+        ignore_conflicts = model in (FavoriteRecipe, ShoppingCart, UserSubs)
+        with transaction.atomic():
+            if ignore_conflicts:
+                # С ignore_conflicts bulk_create возвращает и пропущенные
+                # объекты, поэтому созданные строки считаются по таблице.
+                rows = model.objects.filter(
+                    user_id__in={obj.user_id for obj in objs})
+                before = rows.count()
+            created = model.objects.bulk_create(
+                objs, batch_size=self.chunk_size,
+                ignore_conflicts=ignore_conflicts)
+            count = rows.count() - before if ignore_conflicts else len(created)
+        self.stdout.write(f'{model.__name__}: создано {count}')
+        return created
+
+    def get_next_number(self, model, field: str, prefix: str) -> int:
+        # Номер после наибольшего занятого: count() после удалений
+        # повторил бы уже существующие имена.
+        last = model.objects.filter(
+            **{f'{field}__regex': rf'^{prefix}[0-9]+$'}
+        ).aggregate(
+            last=Max(Cast(Substr(field, len(prefix) + 1), IntegerField()))
+        )['last']
+        return 0 if last is None else last + 1
+
+    def create_tags(self, count: int) -> list[int]:
+        existing = list(Tag.objects.values_list('id', flat=True))
+        if len(existing) >= count:
+            return existing
+        start = self.get_next_number(Tag, 'slug', 'tag-')
+        self.bulk_create(Tag, [
+            Tag(
+                name=f'Тег {number}',
+                slug=f'tag-{number}',
+                color=f'#{number * 0x9E3779 % 0x1000000:06X}',
+            )
+            for number in range(start, start + count - len(existing))
+        ])
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_users(self, count: int) -> list[int]:
+        start = self.get_next_number(User, 'username', 'user')
+        password = make_password('generated-password')
+        users = self.bulk_create(User, [
+            User(
+                username=f'user{number}',
+                email=f'user{number}@example.com',
+                first_name='Имя',
+                last_name=f'Фамилия{number}',
+                password=password,
+            )
+            for number in range(start, start + count)
+        ])
+        return [user.id for user in users]
+
+    def create_image(self) -> str:
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), (200, 120, 60)).save(buffer, 'JPEG')
+        name = default_storage.save(
+            'recipes/images/generated.jpg', ContentFile(buffer.getvalue()))
+        make_derivatives(name)
+        return name
+
+    def create_recipes(self,
+                       count: int,
+                       users_ids: list[int],
+                       ingredients_ids: list[int],
+                       tags_ids: list[int]) -> list[int]:
+        image = self.create_image()
+        authors = self.sampler(users_ids)
+        ingredients = self.sampler(ingredients_ids)
+        tags = self.sampler(tags_ids)
+        per_recipe: int = self.options.get('ingredients_per_recipe')
+        now = timezone.now()
+
+        recipes_ids = []
+        for start in range(0, count, self.chunk_size):
+            size = min(self.chunk_size, count - start)
+            recipes = self.bulk_create(Recipe, [
+                Recipe(
+                    author_id=authors.sample(1).pop(),
+                    name=f'Рецепт {start + number}',
+                    text='Сгенерированный рецепт',
+                    cooking_time=self.rng.randint(5, 180),
+                    image=image,
+                    has_image_derivatives=True,
+                )
+                for number in range(size)
+            ])
+            for recipe in recipes:
+                recipe.created_at = now - timedelta(
+                    seconds=self.rng.randrange(365 * 24 * 3600))
+            Recipe.objects.bulk_update(
+                recipes, ('created_at',), batch_size=self.chunk_size)
+
+            self.bulk_create(RecipeIngredient, [
+                RecipeIngredient(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_id,
+                    amount=self.rng.randint(1, 500),
+                )
+                for recipe in recipes
+                for ingredient_id in ingredients.sample(
+                    self.rng.randint(max(1, per_recipe // 2), per_recipe * 2))
+            ])
+            self.bulk_create(RecipeTag, [
+                RecipeTag(recipe_id=recipe.id, tag_id=tag_id)
+                for recipe in recipes
+                for tag_id in tags.sample(self.rng.randint(1, 3))
+            ])
+            recipes_ids.extend(recipe.id for recipe in recipes)
+        return recipes_ids
+
+    def get_count(self, average: int, alpha: float = 2.0) -> int:
+        return int(average * (alpha - 1) / alpha
+                   * self.rng.paretovariate(alpha))
+
+    def create_relations(self,
+                         users_ids: list[int],
+                         recipes_ids: list[int]) -> None:
+        popular_recipes = self.sampler(recipes_ids)
+        popular_authors = self.sampler(users_ids)
+        relations = (
+            (FavoriteRecipe, 'recipe_id', popular_recipes,
+             self.options.get('favorites_per_user')),
+            (ShoppingCart, 'recipe_id', popular_recipes,
+             self.options.get('cart_per_user')),
+            (UserSubs, 'sub_id', popular_authors,
+             self.options.get('subscriptions_per_user')),
+        )
+        for model, field, sampler, average in relations:
+            objs = []
+            for user_id in users_ids:
+                count = self.get_count(average)
+                exclude = user_id if model is UserSubs else None
+                objs.extend(
+                    model(user_id=user_id, **{field: target_id})
+                    for target_id in sampler.sample(count, exclude=exclude)
+                )
+                if len(objs) >= self.chunk_size:
+                    self.bulk_create(model, objs)
+                    objs = []
+            self.bulk_create(model, objs)
@@ -0,0 +1,155 @@
+import json
+import sys
+import time
+from collections import Counter
+from itertools import islice
+from typing import Any, Iterator, TextIO
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from api.cache import RECIPES_CATALOG, bump_version
+from api.services import change_counter
+from food.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Tag,
+    MIN_COOKING_TIME_AND_AMOUNT,
+    MAX_COOKING_TIME_AND_AMOUNT
+)
+
+
+User = get_user_model()
+
+ParsedRecipe = tuple[Recipe, dict[int, int], list[int]]
+
+
+def check_range(value: Any) -> int:
+    if not isinstance(value, int) or not (
+            MIN_COOKING_TIME_AND_AMOUNT
+            <= value <= MAX_COOKING_TIME_AND_AMOUNT):
+        raise ValueError(f'недопустимое значение {value!r}')
+    return value
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для загрузки рецептов из NDJSON, выгруженного
+    командой export_recipes. Авторы, теги и ингредиенты должны уже
+    существовать; файлы картинок переносятся отдельно.
+    Используйте команду в формате:
+    python manage.py import_recipes <file.ndjson | -> [--chunk-size N]'''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('file_name', type=str)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        file_name: str = options.get('file_name')
+        self.chunk_size: int = options.get('chunk_size')
+        self.users = dict(User.objects.values_list('email', 'id'))
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = dict(Ingredient.objects.values_list('name', 'id'))
+        self.processed = self.imported = self.errors = 0
+        self.started = time.monotonic()
+
+        if file_name == '-':
+            self.load(sys.stdin)
+        else:
+            try:
+                file = open(file_name, encoding='utf')
+            except FileNotFoundError:
+                return 'Файл не найден'
+            with file:
+                self.load(file)
+
+        if self.imported:
+            bump_version(RECIPES_CATALOG)
+        self.stdout.write(
+            f'Готово: обработано {self.processed}, загружено '
+            f'{self.imported}, ошибок в данных {self.errors}.'
+        )
+
+    def load(self, file: TextIO) -> None:
+        rows = self.parse_rows(file)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self.save_chunk(chunk)
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            self.stdout.write(
+                f'Обработано {self.processed} строк '
+                f'({self.processed / elapsed:.0f} строк/с), '
+                f'ошибок {self.errors}.'
+            )
+
+    def parse_rows(self, file: TextIO) -> Iterator[ParsedRecipe]:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            self.processed += 1
+            try:
+                yield self.parse(json.loads(line))
+            except (ValueError, KeyError, TypeError) as error:
+                self.errors += 1
+                self.stderr.write(f'Строка {line_number}: {error!r}')
+
+    def parse(self, row: dict[str, Any]) -> ParsedRecipe:
+        recipe = Recipe(
+            author_id=self.users[row['author']],
+            name=row['name'],
+            text=row['text'],
+            cooking_time=check_range(row['cooking_time']),
+            image=row['image'],
+        )
+        created_at = row.get('created_at')
+        recipe.created_at = created_at and parse_datetime(created_at)
+
+        amounts: dict[int, int] = {}
+        for ingredient in row['ingredients']:
+            ingredient_id = self.ingredients[ingredient['name']]
+            amounts[ingredient_id] = check_range(ingredient['amount'])
+        tags_ids = list(dict.fromkeys(self.tags[slug] for slug in row['tags']))
+        return recipe, amounts, tags_ids
+
+    def save_chunk(self, chunk: list[ParsedRecipe]) -> None:
+        with transaction.atomic():
+            created_at = [recipe.created_at for recipe, _, _ in chunk]
+            recipes = Recipe.objects.bulk_create(
+                [recipe for recipe, _, _ in chunk])
+
+            restored = []
+            for recipe, value in zip(recipes, created_at):
+                if value is not None:
+                    recipe.created_at = value
+                    restored.append(recipe)
+            Recipe.objects.bulk_update(
+                restored, ('created_at',), batch_size=self.chunk_size)
+
+            RecipeIngredient.objects.bulk_create(
+                [
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient_id=ingredient_id,
+                        amount=amount
+                    )
+                    for recipe, (_, amounts, _) in zip(recipes, chunk)
+                    for ingredient_id, amount in amounts.items()
+                ],
+                batch_size=self.chunk_size
+            )
+            RecipeTag.objects.bulk_create(
+                [
+                    RecipeTag(recipe=recipe, tag_id=tag_id)
+                    for recipe, (_, _, tags_ids) in zip(recipes, chunk)
+                    for tag_id in tags_ids
+                ],
+                batch_size=self.chunk_size
+            )
+
+            for author_id, count in Counter(
+                    recipe.author_id for recipe in recipes).items():
+                change_counter(User, author_id, 'recipes_count', count)
+
+        self.imported += len(recipes)
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+
+from api.cache import RECIPES_CATALOG, bump_version
+from api.images import make_derivatives
+from food.models import Recipe
+
+
+def make_derivatives_safe(image_name: str) -> str | None:
+    try:
+        make_derivatives(image_name)
+    except (OSError, ValueError) as error:
+        return str(error)
+    return None
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для создания уменьшенных копий картинок рецептов
+    (миниатюры и WebP). Используйте команду в формате:
+    python manage.py make_image_derivatives [--workers N] [--chunk-size N]
+    [--force]'''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--force', action='store_true')
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        chunk_size: int = options.get('chunk_size')
+        recipes = Recipe.objects.exclude(image='')
+        if not options.get('force'):
+            recipes = recipes.filter(has_image_derivatives=False)
+        rows = list(recipes.order_by('pk').values_list('pk', 'image'))
+
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options.get('workers')) as pool:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                errors = pool.map(
+                    make_derivatives_safe,
+                    [image_name for _, image_name in chunk]
+                )
+                done_ids = []
+                for (pk, image_name), error in zip(chunk, errors):
+                    if error is None:
+                        done_ids.append(pk)
+                    else:
+                        failed += 1
+                        self.stderr.write(f'{image_name}: {error}')
+                done += Recipe.objects.filter(
+                    pk__in=done_ids
+                ).update(has_image_derivatives=True)
+                self.stdout.write(f'Обработано {done + failed} из {len(rows)}')
+
+        if done:
+            bump_version(RECIPES_CATALOG)
+        self.stdout.write(f'Готово: {done}, с ошибками: {failed}.')
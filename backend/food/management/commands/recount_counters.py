@@ -0,0 +1,80 @@
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Count, IntegerField, Model, OuterRef, Subquery
+from django.db.models.expressions import Expression
+from django.db.models.functions import Coalesce
+
+from food.models import FavoriteRecipe, Recipe
+from users.models import UserSubs
+
+
+User = get_user_model()
+
+
+def count_subquery(model: Model, field: str) -> Expression:
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для проверки и исправления счётчиков рецептов,
+    подписчиков и добавлений в избранное. Используйте команду в формате:
+    python manage.py recount_counters [--chunk-size N] [--dry-run]'''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        self.chunk_size: int = options.get('chunk_size')
+        self.dry_run: bool = options.get('dry_run')
+
+        self.repair(User, {
+            'recipes_count': count_subquery(Recipe, 'author'),
+            'subscribers_count': count_subquery(UserSubs, 'sub'),
+        })
+        self.repair(Recipe, {
+            'favorites_count': count_subquery(FavoriteRecipe, 'recipe'),
+        })
+
+    def repair(self, model: Model, counters: dict[str, Expression]) -> None:
+        fields = list(counters)
+        rows = model.objects.order_by('pk').annotate(
+            **{f'actual_{field}': expr for field, expr in counters.items()}
+        ).values_list(
+            'pk', *fields, *(f'actual_{field}' for field in fields)
+        ).iterator(chunk_size=self.chunk_size)
+
+        checked = fixed = 0
+        stale_ids = []
+        for pk, *values in rows:
+            checked += 1
+            if values[:len(fields)] != values[len(fields):]:
+                stale_ids.append(pk)
+            if len(stale_ids) >= self.chunk_size:
+                fixed += self.fix(model, stale_ids, counters)
+                stale_ids = []
+        fixed += self.fix(model, stale_ids, counters)
+
+        action = 'найдено расхождений' if self.dry_run else 'исправлено'
+        self.stdout.write(
+            f'{model.__name__}: проверено {checked}, {action} {fixed}.')
+
+    def fix(self,
+            model: Model,
+            stale_ids: list[int],
+            counters: dict[str, Expression]) -> int:
+        if self.dry_run or not stale_ids:
+            return len(stale_ids)
+        return model.objects.filter(pk__in=stale_ids).update(**counters)
@@ -0,0 +1,122 @@
+import json
+import time
+from typing import Any
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_recipes_list_cache_key
+from api.testing import (
+    get_busiest_user,
+    get_token_client,
+    read_streaming_content,
+    setup_client_environment,
+    summarize_timings
+)
+from food.models import Ingredient, Tag
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для замера задержек горячих эндпоинтов через
+    тестовый клиент Django. Выводит p50/p95/p99 и число запросов к БД
+    в формате JSON. Анонимный список рецептов замеряется дважды: с пустым
+    кэшем страницы и из кэша. Используйте команду в формате:
+    python manage.py run_benchmarks [--repeat N] [--warmup N]
+    [--output file.json]'''
+    cold_cache_endpoints: tuple[str, ...] = ('recipes_anonymous_cold',)
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--output', type=str)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        user = get_busiest_user()
+        if user is None:
+            return ('Нет данных, сначала выполните '
+                    'python manage.py generate_data')
+
+        setup_client_environment()
+        self.anonymous = Client()
+        self.authorized = get_token_client(user)
+        self.repeat: int = options.get('repeat')
+        self.warmup: int = options.get('warmup')
+
+        results = {
+            'vendor': connection.vendor,
+            'repeat': self.repeat,
+            'endpoints': {
+                name: self.measure(
+                    client, url, name in self.cold_cache_endpoints)
+                for name, client, url in self.get_endpoints()
+            },
+        }
+        report = json.dumps(results, ensure_ascii=False, indent=2)
+        if options.get('output'):
+            with open(options.get('output'), 'w', encoding='utf') as file:
+                file.write(report)
+        self.stdout.write(report)
+
+    def get_endpoints(self) -> list[tuple[str, Client, str]]:
+        tags = '&'.join(
+            f'tags={slug}'
+            for slug in Tag.objects.values_list('slug', flat=True)[:2]
+        )
+        prefix = (
+            Ingredient.objects.values_list('name', flat=True).first() or 'а'
+        )[:2]
+        return [
+            ('recipes_anonymous_cold', self.anonymous,
+             '/api/recipes/?limit=6'),
+            ('recipes_anonymous_cached', self.anonymous,
+             '/api/recipes/?limit=6'),
+            ('recipes', self.authorized, '/api/recipes/?limit=6'),
+            ('recipes_deep_page', self.authorized,
+             '/api/recipes/?limit=6&page=100'),
+            ('recipes_tags', self.authorized, f'/api/recipes/?limit=6&{tags}'),
+            ('recipes_favorited', self.authorized,
+             '/api/recipes/?limit=6&is_favorited=1'),
+            ('recipes_in_shopping_cart', self.authorized,
+             '/api/recipes/?limit=6&is_in_shopping_cart=1'),
+            ('subscriptions', self.authorized,
+             '/api/users/subscriptions/?limit=6&recipes_limit=3'),
+            ('download_shopping_cart', self.authorized,
+             '/api/recipes/download_shopping_cart/'),
+            ('ingredients_search', self.anonymous,
+             f'/api/ingredients/?name={prefix}'),
+        ]
+
+    def clear_recipes_list_cache(self, url: str) -> None:
+        cache.delete(get_recipes_list_cache_key(RequestFactory().get(url)))
+
+    def measure(self,
+                client: Client,
+                url: str,
+                is_cold_cache: bool = False) -> dict[str, Any]:
+        timings = []
+        queries = []
+        status_code = None
+        for attempt in range(self.warmup + self.repeat):
+            if is_cold_cache:
+                self.clear_recipes_list_cache(url)
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    read_streaming_content(response)
+                elapsed = time.perf_counter() - started
+            if attempt < self.warmup:
+                continue
+            status_code = response.status_code
+            timings.append(elapsed * 1000)
+            queries.append(len(context))
+
+        return {
+            'url': url,
+            'status': status_code,
+            **summarize_timings(timings),
+            'queries': max(queries),
+        }
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Any
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser
+)
+from rest_framework.authtoken.models import Token
+
+from api.budgets import BUDGET_REQUESTS
+from api.testing import (
+    format_budget_url,
+    get_busiest_user,
+    summarize_timings
+)
+
+
+class Target:
+    def __init__(self, name: str, url: str) -> None:
+        parts = urlsplit(url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise CommandError(f'Ожидается адрес вида http://host:port: {url}')
+        self.name = name
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.timings: list[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: int = 0
+
+
+class Command(BaseCommand):
+    help: str = '''Команда для замера пропускной способности запущенного
+    сервера при параллельных соединениях. Каждый клиент по кругу выполняет
+    GET-запросы из api/budgets.py, медленные клиенты держат соединения
+    открытыми, передавая заголовки по байту. Для сравнения WSGI и ASGI
+    укажите несколько целей с общей базой данных. Используйте команду
+    в формате: python manage.py run_load_benchmark
+    --target wsgi=http://127.0.0.1:8001 --target asgi=http://127.0.0.1:8002
+    [--concurrency N ...] [--duration S] [--slow-clients N]
+    [--output file.json]'''
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--target', action='append', required=True)
+        parser.add_argument('--concurrency', type=int, action='append')
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--slow-clients', type=int, default=0)
+        parser.add_argument('--slow-interval', type=float, default=1)
+        parser.add_argument('--output', type=str)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        user = get_busiest_user()
+        if user is None:
+            raise CommandError(
+                'Нет данных, сначала выполните python manage.py generate_data')
+
+        token, _ = Token.objects.get_or_create(user=user)
+        self.requests = [
+            (quote(format_budget_url(url), safe='/?=&'),
+             f'Authorization: Token {token.key}\r\n' if is_authorized else '')
+            for url, is_authorized in BUDGET_REQUESTS
+        ]
+        self.duration: float = options.get('duration')
+        self.timeout: float = options.get('timeout')
+        self.slow_clients: int = options.get('slow_clients')
+        self.slow_interval: float = options.get('slow_interval')
+
+        targets = []
+        for value in options.get('target'):
+            name, _, url = value.rpartition('=')
+            targets.append(Target(name or url, url))
+
+        concurrencies = options.get('concurrency') or (1, 16, 64)
+        results = {
+            'duration': self.duration,
+            'slow_clients': self.slow_clients,
+            'targets': {
+                target.name: {
+                    concurrency: asyncio.run(self.measure(target, concurrency))
+                    for concurrency in concurrencies
+                }
+                for target in targets
+            },
+        }
+        report = json.dumps(results, ensure_ascii=False, indent=2)
+        if options.get('output'):
+            with open(options.get('output'), 'w', encoding='utf') as file:
+                file.write(report)
+        self.stdout.write(report)
+
+    async def measure(self, target: Target, concurrency: int) -> dict:
+        stats = Stats()
+        deadline = time.perf_counter() + self.duration
+        slow = [
+            asyncio.create_task(self.hold_slow_client(target, deadline))
+            for _ in range(self.slow_clients)
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.run_client(target, deadline, stats, offset)
+            for offset in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+        for task in slow:
+            task.cancel()
+        await asyncio.gather(*slow, return_exceptions=True)
+
+        return {
+            'requests': len(stats.timings),
+            'errors': stats.errors,
+            'rps': round(len(stats.timings) / elapsed, 1),
+            **(summarize_timings(stats.timings) if stats.timings else {}),
+            'statuses': dict(stats.statuses),
+        }
+
+    async def run_client(self,
+                         target: Target,
+                         deadline: float,
+                         stats: Stats,
+                         offset: int) -> None:
+        position = offset
+        while time.perf_counter() < deadline:
+            path, headers = self.requests[position % len(self.requests)]
+            position += 1
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(
+                    self.fetch(target, path, headers), self.timeout)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+                stats.errors += 1
+                continue
+            stats.timings.append((time.perf_counter() - started) * 1000)
+            stats.statuses[status] += 1
+
+    async def fetch(self, target: Target, path: str, headers: str) -> int:
+        reader, writer = await asyncio.open_connection(
+            target.host, target.port)
+        try:
+            writer.write((
+                f'GET {target.prefix}{path} HTTP/1.1\r\n'
+                f'Host: {target.netloc}\r\n'
+                f'Accept: */*\r\n'
+                f'{headers}'
+                f'Connection: close\r\n\r\n'
+            ).encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+        finally:
+            writer.close()
+        return int(status_line.split()[1])
+
+    async def hold_slow_client(self, target: Target, deadline: float) -> None:
+        # Клиент на медленном канале: заголовки приходят по байту.
+        reader, writer = await asyncio.open_connection(
+            target.host, target.port)
+        try:
+            writer.write((
+                f'GET {target.prefix}/api/tags/ HTTP/1.1\r\n'
+                f'Host: {target.netloc}\r\nX-Slow: '
+            ).encode())
+            while time.perf_counter() < deadline:
+                writer.write(b'x')
+                await writer.drain()
+                await asyncio.sleep(self.slow_interval)
+        finally:
+            writer.close()
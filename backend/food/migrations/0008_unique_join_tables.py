@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+UNIQUE_FIELDS = (
+    ('FavoriteRecipe', ('user', 'recipe')),
+    ('ShoppingCart', ('user', 'recipe')),
+    ('RecipeTag', ('recipe', 'tag')),
+    ('RecipeIngredient', ('recipe', 'ingredient')),
+)
+
+
+def delete_duplicates(apps, schema_editor):
+    for model_name, fields in UNIQUE_FIELDS:
+        model = apps.get_model('food', model_name)
+        keep_ids = model.objects.order_by().values(*fields).annotate(
+            keep_id=Min('id')
+        ).values('keep_id')
+        model.objects.exclude(id__in=keep_ids).delete()
+
+    Recipe = apps.get_model('food', 'Recipe')
+    FavoriteRecipe = apps.get_model('food', 'FavoriteRecipe')
+    Recipe.objects.update(
+        favorites_count=Coalesce(
+            Subquery(
+                FavoriteRecipe.objects.filter(
+                    recipe=OuterRef('pk')
+                ).order_by().values('recipe').annotate(
+                    total=Count('pk')
+                ).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0007_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favoriterecipe',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_favorite_recipe'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('recipe', 'ingredient'), name='unique_recipe_ingredient'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipetag',
+            constraint=models.UniqueConstraint(fields=('recipe', 'tag'), name='unique_recipe_tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_shopping_cart'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food', '0008_unique_join_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='has_image_derivatives',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Созданы уменьшенные копии картинки'),
+        ),
+    ]
@@ -73,9 +73,29 @@ class Recipe(models.Model):
         verbose_name='Дата создания',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Количество добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    has_image_derivatives = models.BooleanField(
+        'Созданы уменьшенные копии картинки',
+        default=False,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-created_at',)
+        indexes = (
+            models.Index(
+                fields=('-created_at', '-id'),
+                name='recipe_created_at_id_idx'
+            ),
+        )
 
     def __str__(self) -> str:
         return self.name
@@ -97,6 +117,12 @@ class RecipeTag(models.Model):
 
     class Meta:
         ordering = ('recipe',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'tag'),
+                name='unique_recipe_tag'
+            ),
+        )
 
 
 class RecipeIngredient(models.Model):
@@ -122,6 +148,12 @@ class RecipeIngredient(models.Model):
 
     class Meta:
         ordering = ('recipe',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient'),
+                name='unique_recipe_ingredient'
+            ),
+        )
 
 
 class FavoriteRecipe(models.Model):
@@ -140,6 +172,12 @@ class FavoriteRecipe(models.Model):
 
     class Meta:
         ordering = ('user',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_favorite_recipe'
+            ),
+        )
 
 
 class ShoppingCart(models.Model):
@@ -158,3 +196,9 @@ class ShoppingCart(models.Model):
 
     class Meta:
         ordering = ('user',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_shopping_cart'
+            ),
+        )
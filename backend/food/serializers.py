@@ -1,23 +1,34 @@
-import base64
+import json
 
 from rest_framework import serializers
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.db.models import Manager
+from django.http import QueryDict
 
 from food.models import (
     Tag, Ingredient, Recipe,
     MIN_COOKING_TIME_AND_AMOUNT, MAX_COOKING_TIME_AND_AMOUNT
 )
 from users.serializers import UserSerializer
+from api.registries import tag_registry
+from api.timing import TimedListSerializer, TimedSerializerMixin
+from api.fields import RecipeImageField
+from api.images import check_image_limits, decode_base64_image
+from api.exceptions import (
+    ImageTooLargeError,
+    ImageTooManyPixelsError,
+    InvalidImageError
+)
 from api.services import (
-    get_recipe_ingredients_with_amounts,
-    get_available_ids,
+    get_recipes_ingredients,
+    get_duplicate_ids,
+    get_missing_ids,
     create_recipe,
-    add_ingredients_to_recipe,
-    add_tags_to_recipe
+    update_recipe
 )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Tag
@@ -30,10 +41,13 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = (
             'id',
         )
+        list_serializer_class = TimedListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
-    measurement_unit = serializers.StringRelatedField()
+class IngredientSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
+    measurement_unit = serializers.CharField(
+        source='measurement_unit__name')
 
     class Meta:
         model = Ingredient
@@ -42,6 +56,7 @@ class IngredientSerializer(serializers.ModelSerializer):
             'name',
             'measurement_unit',
         )
+        list_serializer_class = TimedListSerializer
 
 
 class IngredientPOSTSerializer(serializers.ModelSerializer):
@@ -66,36 +81,34 @@ class IngredientPOSTSerializer(serializers.ModelSerializer):
             )
         return super().validate(attrs)
 
-    def validate_id(self, value):
-        if value not in get_available_ids(Ingredient):
-            raise serializers.ValidationError(
-                f'Ингредиента {value} не существует')
-        return value
 
+class InlineIngredientSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='ingredient_id')
+    name = serializers.CharField(source='ingredient__name')
+    measurement_unit = serializers.CharField(
+        source='ingredient__measurement_unit__name')
+    amount = serializers.IntegerField()
 
-class InlineIngredientSerializer(serializers.ModelSerializer):
-    measurement_unit = serializers.StringRelatedField()
-    amount = serializers.SerializerMethodField()
 
-    class Meta:
-        model = Ingredient
-        fields = (
-            'id',
-            'name',
-            'measurement_unit',
-            'amount',
-        )
+class RecipeListSerializer(TimedListSerializer):
 
-    def get_amount(self, obj):
-        return self.context.get('amounts')[obj.id]
+    def to_representation(self, data):
+        recipes = list(data.all() if isinstance(data, Manager) else data)
+        if self.context.get('recipes_ingredients') is None:
+            self.context['recipes_ingredients'] = get_recipes_ingredients(
+                [recipe.id for recipe in recipes]
+            )
+        return super().to_representation(recipes)
 
 
-class RecipeGETSerializer(serializers.ModelSerializer):
+class RecipeGETSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tags = TagSerializer(read_only=True, many=True)
     author = serializers.SerializerMethodField()
     ingredients = serializers.SerializerMethodField()
-    is_favorited = serializers.SerializerMethodField('is_favorite')
-    is_in_shopping_cart = serializers.SerializerMethodField('shopping_cart')
+    # Флаги аннотирует annotate_recipes_user_flags.
+    is_favorited = serializers.SerializerMethodField()
+    is_in_shopping_cart = serializers.SerializerMethodField()
+    image = RecipeImageField(list_derivative='card', read_only=True)
 
     class Meta:
         model = Recipe
@@ -117,36 +130,54 @@ class RecipeGETSerializer(serializers.ModelSerializer):
             'is_favorited',
             'is_in_shopping_cart',
         )
+        list_serializer_class = RecipeListSerializer
 
     def get_author(self, obj):
+        obj.author.is_subscribed = obj.is_author_subscribed
         return UserSerializer(
             obj.author,
-            context={'request': self.context.get('request'),
-                     'subs_ids': self.context.get('subs_ids')}
+            context={'request': self.context.get('request')}
         ).data
 
-    def is_favorite(self, obj):
-        return obj.id in self.context.get('favorite_recipes_ids')
+    def get_is_favorited(self, obj):
+        return obj.is_favorited
 
-    def shopping_cart(self, obj):
-        return obj.id in self.context.get('shopping_cart')
+    def get_is_in_shopping_cart(self, obj):
+        return obj.is_in_shopping_cart
 
     def get_ingredients(self, obj):
-        ingredients, amounts = get_recipe_ingredients_with_amounts(obj.id)
+        recipes_ingredients = self.context.get('recipes_ingredients')
+        if recipes_ingredients is None or obj.id not in recipes_ingredients:
+            recipes_ingredients = get_recipes_ingredients([obj.id])
         return InlineIngredientSerializer(
-            ingredients,
-            many=True,
-            context={'recipe_id': obj.id,
-                     'amounts': amounts}
+            recipes_ingredients[obj.id],
+            many=True
         ).data
 
 
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'too_large': 'Размер изображения превышает {max_size} байт',
+        'too_many_pixels': 'Изображение больше {max_pixels} пикселей',
+    }
+
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+        max_size = settings.RECIPE_IMAGE_MAX_SIZE
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        try:
+            if isinstance(data, str) and data.startswith('data:image'):
+                format, imgstr = data.split(';base64,')
+                ext = format.split('/')[-1]
+                data = decode_base64_image(
+                    imgstr, name='temp.' + ext, max_size=max_size)
+            if hasattr(data, 'size') and hasattr(data, 'seek'):
+                check_image_limits(data, max_size, max_pixels)
+        except (ValueError, InvalidImageError):
+            self.fail('invalid_image')
+        except ImageTooLargeError:
+            self.fail('too_large', max_size=max_size)
+        except ImageTooManyPixelsError:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
 
         return super().to_internal_value(data)
 
@@ -171,16 +202,67 @@ class RecipePOSTSerializer(serializers.ModelSerializer):
             'cooking_time',
         )
 
+    def to_internal_value(self, data):
+        if isinstance(data, QueryDict):
+            data = self.parse_form_data(data)
+        return super().to_internal_value(data)
+
+    def parse_form_data(self, data: QueryDict) -> dict:
+        parsed = data.dict()
+        for field in ('ingredients', 'tags'):
+            if field not in data:
+                continue
+            values = data.getlist(field)
+            if len(values) != 1:
+                parsed[field] = values
+                continue
+            try:
+                parsed[field] = json.loads(values[0])
+            except ValueError:
+                raise serializers.ValidationError(
+                    {field: 'Ожидается JSON-массив'})
+            if isinstance(parsed[field], int):
+                parsed[field] = [parsed[field]]
+        return parsed
+
     def validate_tags(self, value):
         if not value:
             raise serializers.ValidationError(
                 'Получен пустой список')
-        for tag_id in value:
-            if tag_id not in get_available_ids(Tag):
-                raise serializers.ValidationError(
-                    'Такого тега не существует')
+        self.check_ids(
+            duplicate_ids=get_duplicate_ids(value),
+            missing_ids=sorted(
+                {tag_id for tag_id in value if not tag_registry.exists(tag_id)}
+            ),
+            name='Теги'
+        )
         return value
 
+    def validate_ingredients(self, value):
+        ingredients_ids = [ingredient['id'] for ingredient in value]
+        self.check_ids(
+            duplicate_ids=get_duplicate_ids(ingredients_ids),
+            missing_ids=get_missing_ids(Ingredient, ingredients_ids),
+            name='Ингредиенты'
+        )
+        return value
+
+    def check_ids(self,
+                  duplicate_ids: list[int],
+                  missing_ids: list[int],
+                  name: str) -> None:
+        errors = []
+        if duplicate_ids:
+            errors.append(
+                f'{name} повторяются: '
+                f'{", ".join(map(str, duplicate_ids))}')
+        if missing_ids:
+            errors.append(
+                f'{name} не существуют: '
+                f'{", ".join(map(str, missing_ids))}')
+        if errors:
+            raise serializers.ValidationError(errors)
+
     def create(self, validated_data):
         return create_recipe(
             author_id=self.context.get('request').user.id,
@@ -190,27 +272,14 @@ class RecipePOSTSerializer(serializers.ModelSerializer):
         )
 
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-        image = validated_data.get('image')
-
-        if image:
-            instance.image = image
-        instance.name = validated_data.get('name')
-        instance.text = validated_data.get('text')
-        instance.cooking_time = validated_data.get('cooking_time')
-
-        instance.save()
-
-        add_ingredients_to_recipe(
-            edit=True,
-            recipe=instance,
-            ingredients_amounts=ingredients
-        )
-        add_tags_to_recipe(
-            edit=True,
-            recipe=instance,
-            tags_ids=tags
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        if not validated_data.get('image'):
+            validated_data.pop('image', None)
+
+        return update_recipe(
+            instance,
+            ingredients=ingredients,
+            tags_ids=tags,
+            **validated_data
         )
-
-        return instance
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicates(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    UserSubs = apps.get_model('users', 'UserSubs')
+    keep_ids = UserSubs.objects.order_by().values('user', 'sub').annotate(
+        keep_id=Min('id')
+    ).values('keep_id')
+    UserSubs.objects.exclude(id__in=keep_ids).delete()
+    User.objects.update(
+        subscribers_count=Coalesce(
+            Subquery(
+                UserSubs.objects.filter(
+                    sub=OuterRef('pk')
+                ).order_by().values('sub').annotate(
+                    total=Count('pk')
+                ).values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usersubs',
+            constraint=models.UniqueConstraint(fields=('user', 'sub'), name='unique_user_subs'),
+        ),
+    ]
@@ -16,6 +16,16 @@ class User(AbstractUser):
         _('email address'),
         unique=True,
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('first_name',)
@@ -52,3 +62,9 @@ class UserSubs(models.Model):
 
     class Meta:
         ordering = ('user',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'sub'),
+                name='unique_user_subs'
+            ),
+        )
@@ -1,17 +1,34 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Manager
 from djoser.serializers import (
     UserSerializer as DjoserUserSerializer,
     UserCreateSerializer as DjoserUserCreateSerializer
 )
 
 from food.models import Recipe
+from api.fields import RecipeImageField
+from api.timing import TimedListSerializer, TimedSerializerMixin
+from api.services import get_authors_recipes
 
 
 User = get_user_model()
 
 
-class UserSerializer(DjoserUserSerializer):
+class SubscribeListSerializer(TimedListSerializer):
+
+    def to_representation(self, data):
+        users = list(data.all() if isinstance(data, Manager) else data)
+        if self.context.get('authors_recipes') is None:
+            self.context['authors_recipes'] = get_authors_recipes(
+                [user.id for user in users],
+                self.context.get('recipes_limit')
+            )
+        return super().to_representation(users)
+
+
+class UserSerializer(TimedSerializerMixin, DjoserUserSerializer):
+    # Флаг аннотирует queryset вьюсета (annotate_is_subscribed).
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -24,10 +41,10 @@ class UserSerializer(DjoserUserSerializer):
             'last_name',
             'is_subscribed',
         ]
+        list_serializer_class = TimedListSerializer
 
     def get_is_subscribed(self, obj):
-        subs = self.context.get('subs_ids')
-        return obj.id in subs
+        return obj.is_subscribed
 
 
 class UserCreateSerializer(DjoserUserCreateSerializer):
@@ -43,7 +60,9 @@ class UserCreateSerializer(DjoserUserCreateSerializer):
         ]
 
 
-class UserRecipesSerializer(serializers.ModelSerializer):
+class UserRecipesSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
+    image = RecipeImageField(derivative='thumbnail', read_only=True)
 
     class Meta:
         model = Recipe
@@ -55,10 +74,9 @@ class UserRecipesSerializer(serializers.ModelSerializer):
         )
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
+class SubscribeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -72,17 +90,17 @@ class SubscribeSerializer(serializers.ModelSerializer):
             'recipes',
             'recipes_count'
         ]
-
-    def get_recipes_count(self, obj):
-        return len(self.context.get('subs_recipes')[obj.id])
+        list_serializer_class = SubscribeListSerializer
 
     def get_is_subscribed(self, obj):
-        subs = self.context.get('subs_ids')
-        return obj.id in subs
+        return obj.is_subscribed
 
     def get_recipes(self, obj):
+        authors_recipes = self.context.get('authors_recipes')
+        if authors_recipes is None or obj.id not in authors_recipes:
+            authors_recipes = get_authors_recipes(
+                [obj.id], self.context.get('recipes_limit'))
         return UserRecipesSerializer(
-            self.context.get(
-                'subs_recipes')[obj.id][:self.context.get('recipes_limit')],
+            authors_recipes[obj.id],
             many=True,
         ).data